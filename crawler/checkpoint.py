@@ -0,0 +1,82 @@
+"""
+DMM Crawl Checkpoint
+Append-only JSONL log of completed products and pages so a crawl can resume after a crash
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+
+
+class CrawlCheckpoint:
+    """
+    One JSON object per line:
+        {"type": "product", "page": 1, "product": {...}}   product fully extracted
+        {"type": "page", "page": 1, "count": 120}          every product on the page is done
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.file = None
+        self._lock = threading.Lock()  # Detail pool threads append concurrently
+
+    def open(self, resume=False):
+        """Open for appending; without resume any previous checkpoint is discarded"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def remove(self):
+        """Delete the checkpoint once the crawl has finished (nothing left to resume)"""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _append(self, record):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            self.file.write(line)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def append_product(self, product, page_num):
+        """Record one completed product"""
+        self._append({'type': 'product', 'page': page_num, 'product': product})
+
+    def mark_page_done(self, page_num, count):
+        """Record that every product on a page is complete"""
+        self._append({'type': 'page', 'page': page_num, 'count': count})
+
+    def load(self):
+        """
+        Read the checkpoint
+        Returns (products by page, set of completed pages); a truncated last line is ignored
+        """
+        products_by_page = {}
+        done_pages = set()
+
+        if not self.path.exists():
+            return products_by_page, done_pages
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Partial line from a hard kill
+
+                if record.get('type') == 'product':
+                    # Later records for the same index win (re-extracted after a resume)
+                    product = record['product']
+                    products_by_page.setdefault(record['page'], {})[product.get('index')] = product
+                elif record.get('type') == 'page':
+                    done_pages.add(record['page'])
+
+        return products_by_page, done_pages
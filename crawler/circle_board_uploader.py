@@ -5,16 +5,16 @@ Optimized for dmm_crawler_v2 CSV format
 """
 
 import os
-import csv
 import asyncio
-import aiohttp
-import boto3
-import concurrent.futures
 from pathlib import Path
 from datetime import datetime
 from collections import defaultdict
 from dotenv import load_dotenv
 
+from product_table import load_card_products
+from image_transfer import ImageTransfer, card_pipeline
+from miro_writer import MiroItemWriter, text_box_item, image_item
+
 load_dotenv()
 
 
@@ -26,21 +26,9 @@ class CircleBoardUploader:
         if not self.miro_token:
             raise ValueError("MIRO_TOKEN not found in environment variables")
 
-        self.headers = {
-            'Authorization': f'Bearer {self.miro_token}',
-            'Content-Type': 'application/json'
-        }
-
-        # AWS S3 configuration
-        aws_config = {
-            'aws_access_key_id': os.getenv('AWS_ACCESS_KEY_ID'),
-            'aws_secret_access_key': os.getenv('AWS_SECRET_ACCESS_KEY'),
-            'region_name': os.getenv('S3_REGION', 'ap-northeast-2')
-        }
-
-        self.s3_bucket = os.getenv('S3_BUCKET_NAME')
-        self.s3_prefix = 'dmm-circle-images/'
-        self.s3 = boto3.client("s3", **aws_config)
+        # S3 client, image keys, HTTP sessions and the Miro client come from the run's ImageTransfer
+        self.transfer = None
+        self.writer = None  # Bulk item writer for the board being built
 
         self.board_id = None
 
@@ -65,88 +53,31 @@ class CircleBoardUploader:
             'failed_images': 0
         }
 
-    def create_miro_board(self, board_name: str, description: str = "") -> bool:
+    async def create_miro_board(self, board_name: str, description: str = "") -> bool:
         """Create a new Miro board"""
-        import requests
-
-        try:
-            board_payload = {
-                "name": board_name,
-                "description": description
-            }
-
-            response = requests.post(
-                "https://api.miro.com/v2/boards",
-                headers=self.headers,
-                json=board_payload
-            )
-
-            if response.status_code == 201:
-                board_data = response.json()
-                self.board_id = board_data["id"]
-                board_url = f"https://miro.com/app/board/{self.board_id}/"
-                print(f"  Miro board created: {board_name}")
-                print(f"  Board URL: {board_url}")
-                return True
-            else:
-                print(f"  Miro board creation failed: {response.status_code}")
-                print(f"Response: {response.text}")
-                return False
-
-        except Exception as e:
-            print(f"  Miro board creation exception: {e}")
+        board_id = await self.transfer.miro.create_board(board_name, description)
+        if not board_id:
             return False
 
+        self.board_id = board_id
+        board_url = f"https://miro.com/app/board/{self.board_id}/"
+        print(f"  Miro board created: {board_name}")
+        print(f"  Board URL: {board_url}")
+        return True
+
     def read_product_csv(self, csv_path: str) -> dict:
-        """Read CSV and return products grouped by circle"""
+        """Read a CSV or Parquet snapshot and return products grouped by circle"""
         if not os.path.exists(csv_path):
             raise ValueError(f"CSV not found: {csv_path}")
 
         circles = defaultdict(list)
 
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                product_data = {
-                    # Base fields
-                    'index': int(row.get('index', 0)) if row.get('index', '').isdigit() else 0,
-                    'category': row.get('category', ''),
-                    'image_url': row.get('image_url', ''),
-                    'product_url': row.get('product_url', ''),
-                    'title': row.get('title', ''),
-                    'writer': row.get('writer', 'Unknown'),
-                    'genre': row.get('genre', ''),
-                    'is_exclusive': row.get('is_exclusive', '') == 'True',
-                    'discount': row.get('discount', ''),
-                    'sale_price': row.get('sale_price', ''),
-                    'original_price': row.get('original_price', ''),
-                    'copies_sold': row.get('copies_sold', '0'),
-                    'rating': row.get('rating', ''),
-                    'review_count': row.get('review_count', ''),
-                    # Detail fields
-                    'extra_info': row.get('extra_info', ''),
-                    'total_sales': row.get('total_sales', ''),
-                    'review_count_detail': row.get('review_count_detail', ''),
-                    'favorites': row.get('favorites', ''),
-                    'release_date': row.get('release_date', ''),
-                    'contents_meta': row.get('contents_meta', ''),
-                    'format': row.get('format', ''),
-                    'pages': row.get('pages', ''),
-                    'genres': row.get('genres', ''),
-                    'file_size': row.get('file_size', ''),
-                    'title_detail': row.get('title_detail', ''),
-                    'circle': row.get('circle', ''),
-                    'circle_fans': row.get('circle_fans', ''),
-                    'campaign_discount': row.get('campaign_discount', ''),
-                    'campaign_end_date': row.get('campaign_end_date', ''),
-                    'campaign_price': row.get('campaign_price', ''),
-                    'original_price_detail': row.get('original_price_detail', ''),
-                }
-
-                # Use circle name, fallback to writer
-                circle_name = product_data.get('circle') or product_data.get('writer') or 'Unknown'
-                circles[circle_name].append(product_data)
-                self.stats['total_products'] += 1
+        # Values come back typed (ints, floats, bools) from CSV or Parquet
+        for product_data in load_card_products(csv_path):
+            # Use circle name, fallback to writer
+            circle_name = product_data.get('circle') or product_data.get('writer') or 'Unknown'
+            circles[circle_name].append(product_data)
+            self.stats['total_products'] += 1
 
         # Sort products within each circle by index
         for circle_name in circles:
@@ -156,12 +87,7 @@ class CircleBoardUploader:
         def get_circle_total_sales(circle_products):
             total = 0
             for p in circle_products:
-                sales = p.get('total_sales') or p.get('copies_sold', '0')
-                if sales:
-                    try:
-                        total += int(str(sales).replace(',', ''))
-                    except:
-                        pass
+                total += p.get('total_sales') or p.get('copies_sold') or 0
             return total
 
         sorted_circles = dict(sorted(
@@ -173,107 +99,19 @@ class CircleBoardUploader:
         self.stats['total_circles'] = len(sorted_circles)
         return sorted_circles
 
-    async def upload_image_to_s3_async(self, image_url: str, s3_key: str) -> str:
-        """Download image from URL and upload to S3, return presigned URL"""
-        import aiohttp
-
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(image_url) as response:
-                    if response.status != 200:
-                        self.stats['failed_images'] += 1
-                        return None
-                    image_data = await response.read()
-
-            loop = asyncio.get_event_loop()
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                await loop.run_in_executor(
-                    executor,
-                    lambda: self.s3.put_object(
-                        Bucket=self.s3_bucket,
-                        Key=s3_key,
-                        Body=image_data,
-                        ContentType='image/jpeg'
-                    )
-                )
-
-            presigned_url = self.s3.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': self.s3_bucket, 'Key': s3_key},
-                ExpiresIn=604800
-            )
-
+    async def upload_image_to_s3_async(self, image_url: str) -> str:
+        """Upload image to S3 through the shared transfer (skipped if already there), return presigned URL"""
+        presigned_url = await self.transfer.upload(image_url)
+        if presigned_url:
             self.stats['uploaded_images'] += 1
-            return presigned_url
-
-        except Exception as e:
+        else:
             self.stats['failed_images'] += 1
-            return None
-
-    async def create_text_box(self, session: aiohttp.ClientSession, text: str,
-                             x: float, y: float, width: float, height: float,
-                             fill_color: str = "#ffffff", font_size: int = 12, bold: bool = False) -> bool:
-        """Create a text box on Miro board"""
-        url = f"https://api.miro.com/v2/boards/{self.board_id}/shapes"
-
-        content = f"<p><strong>{text}</strong></p>" if bold else f"<p>{text}</p>"
-
-        payload = {
-            "data": {
-                "content": content,
-                "shape": "rectangle"
-            },
-            "style": {
-                "fillColor": fill_color
-            },
-            "position": {
-                "x": x,
-                "y": y
-            },
-            "geometry": {
-                "width": width,
-                "height": height
-            }
-        }
-
-        try:
-            async with session.post(url, headers=self.headers, json=payload) as response:
-                if response.status not in [200, 201]:
-                    error_text = await response.text()
-                    print(f"    Text box failed ({response.status}): {error_text[:100]}")
-                return response.status in [200, 201]
-        except Exception as e:
-            print(f"    Text box exception: {e}")
-            return False
-
-    async def add_image_to_board(self, session: aiohttp.ClientSession, image_url: str,
-                                x: float, y: float, width: float, title: str = "") -> bool:
-        """Add image to Miro board"""
-        url = f"https://api.miro.com/v2/boards/{self.board_id}/images"
-        payload = {
-            "data": {
-                "url": image_url,
-                "title": title
-            },
-            "position": {
-                "x": x,
-                "y": y
-            },
-            "geometry": {
-                "width": width
-            }
-        }
-
-        try:
-            async with session.post(url, headers=self.headers, json=payload) as response:
-                return response.status in [200, 201]
-        except Exception as e:
-            return False
+        return presigned_url
 
-    async def create_circle_header(self, session: aiohttp.ClientSession, circle_name: str,
+    async def create_circle_header(self, circle_name: str,
                                    products: list, x: float, y: float, width: float):
         """Create header for a circle group"""
-        tasks = []
+        items = []
 
         # Calculate circle stats
         total_sales = 0
@@ -282,20 +120,12 @@ class CircleBoardUploader:
         circle_fans = None
 
         for p in products:
-            sales = p.get('total_sales') or p.get('copies_sold', '0')
-            if sales:
-                try:
-                    total_sales += int(str(sales).replace(',', ''))
-                except:
-                    pass
+            total_sales += p.get('total_sales') or p.get('copies_sold') or 0
 
             rating = p.get('rating', '')
-            if rating:
-                try:
-                    avg_rating += float(rating)
-                    rating_count += 1
-                except:
-                    pass
+            if rating != '':
+                avg_rating += rating
+                rating_count += 1
 
             if not circle_fans and p.get('circle_fans'):
                 circle_fans = p.get('circle_fans')
@@ -306,9 +136,8 @@ class CircleBoardUploader:
         center_x = x + width / 2
 
         # Circle name header
-        tasks.append(
-            self.create_text_box(
-                session,
+        items.append(
+            text_box_item(
                 f"  {circle_name}",
                 center_x,
                 y + 25,
@@ -329,9 +158,8 @@ class CircleBoardUploader:
         if circle_fans:
             stats_parts.append(f"  {circle_fans} fans")
 
-        tasks.append(
-            self.create_text_box(
-                session,
+        items.append(
+            text_box_item(
                 " | ".join(stats_parts),
                 center_x,
                 y + 60,
@@ -342,20 +170,19 @@ class CircleBoardUploader:
             )
         )
 
-        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.writer.add(items)
 
-    async def create_product_card(self, session: aiohttp.ClientSession, product: dict,
+    async def create_product_card(self, product: dict,
                                  card_x: float, card_y: float, image_url: str = None):
         """Create a product card - works with base, detail, or extra mode data"""
-        tasks = []
+        items = []
 
         center_x = card_x + self.card_width / 2
         current_y = card_y
 
         # 1. Rank badge
-        tasks.append(
-            self.create_text_box(
-                session,
+        items.append(
+            text_box_item(
                 f"#{product['index']}",
                 center_x,
                 current_y + 15,
@@ -370,9 +197,8 @@ class CircleBoardUploader:
         # 2. Product image
         current_y += 35
         if image_url:
-            tasks.append(
-                self.add_image_to_board(
-                    session,
+            items.append(
+                image_item(
                     image_url,
                     center_x,
                     current_y + self.image_height / 2,
@@ -385,9 +211,8 @@ class CircleBoardUploader:
         # 3. Title
         title_text = product.get('title_detail') or product.get('title', '')
         title_text = title_text[:35] + "..." if len(title_text) > 35 else title_text
-        tasks.append(
-            self.create_text_box(
-                session,
+        items.append(
+            text_box_item(
                 title_text,
                 center_x,
                 current_y,
@@ -414,9 +239,8 @@ class CircleBoardUploader:
             price_text += f" ← {original_price}円"
 
         if price_text:
-            tasks.append(
-                self.create_text_box(
-                    session,
+            items.append(
+                text_box_item(
                     price_text,
                     center_x,
                     current_y,
@@ -431,9 +255,8 @@ class CircleBoardUploader:
         current_y += 20
         sales = product.get('total_sales') or product.get('copies_sold', '')
         if sales:
-            tasks.append(
-                self.create_text_box(
-                    session,
+            items.append(
+                text_box_item(
                     f"  {sales}부 판매",
                     center_x,
                     current_y,
@@ -460,9 +283,8 @@ class CircleBoardUploader:
             rating_text += f" | ❤️ {favorites}"
 
         if rating_text.strip():
-            tasks.append(
-                self.create_text_box(
-                    session,
+            items.append(
+                text_box_item(
                     rating_text,
                     center_x,
                     current_y,
@@ -483,9 +305,8 @@ class CircleBoardUploader:
                 info_parts.append(f"  {release_date}")
             if pages:
                 info_parts.append(f"  {pages}p")
-            tasks.append(
-                self.create_text_box(
-                    session,
+            items.append(
+                text_box_item(
                     " | ".join(info_parts),
                     center_x,
                     current_y,
@@ -500,9 +321,8 @@ class CircleBoardUploader:
         extra_info = product.get('extra_info', '')
         if extra_info:
             current_y += 20
-            tasks.append(
-                self.create_text_box(
-                    session,
+            items.append(
+                text_box_item(
                     f"  {extra_info[:40]}",
                     center_x,
                     current_y,
@@ -515,9 +335,8 @@ class CircleBoardUploader:
 
         # 9. Exclusive badge
         if product.get('is_exclusive'):
-            tasks.append(
-                self.create_text_box(
-                    session,
+            items.append(
+                text_box_item(
                     "전매",
                     card_x + self.card_width - 30,
                     card_y + 15,
@@ -529,7 +348,7 @@ class CircleBoardUploader:
                 )
             )
 
-        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.writer.add(items)
 
     async def upload_products_by_circle(self, circles: dict):
         """Upload products grouped by circle to Miro"""
@@ -537,75 +356,49 @@ class CircleBoardUploader:
         print(f"   Total circles: {len(circles)}")
         print(f"   Total products: {self.stats['total_products']}\n")
 
-        # Step 1: Upload all images to S3
-        print("  Step 1: Uploading images to S3...")
-
-        all_products = []
-        for circle_name, products in circles.items():
-            for product in products:
-                product['_circle_name'] = circle_name
-                all_products.append(product)
-
-        image_urls = {}
-        semaphore = asyncio.Semaphore(10)
-
-        async def upload_with_semaphore(product):
-            async with semaphore:
-                image_url = product.get('image_url', '')
-                if not image_url:
-                    return
-
-                s3_key = f"{self.s3_prefix}{product['category']}/product_{product['index']}.jpg"
-                url = await self.upload_image_to_s3_async(image_url, s3_key)
-                if url:
-                    image_urls[product['index']] = url
-
-        upload_tasks = [upload_with_semaphore(product) for product in all_products]
-        await asyncio.gather(*upload_tasks, return_exceptions=True)
-        print(f"   Uploaded {len(image_urls)}/{len(all_products)} images to S3\n")
-
-        # Step 2: Create Miro layout
-        print("  Step 2: Creating circle groups on Miro...")
+        # Images stream to S3 while cards are created; each card is placed as soon as its image is ready
+        print("  Uploading images and creating circle groups on Miro...")
 
+        items = []
         current_y = self.start_y
 
-        async with aiohttp.ClientSession() as session:
-            for circle_idx, (circle_name, products) in enumerate(circles.items()):
-                # Calculate width needed for this circle's products
-                num_products = len(products)
-                cards_per_row = min(num_products, 10)  # Max 10 per row
-                num_rows = (num_products + cards_per_row - 1) // cards_per_row
+        for circle_idx, (circle_name, products) in enumerate(circles.items()):
+            # Calculate width needed for this circle's products
+            num_products = len(products)
+            cards_per_row = min(num_products, 10)  # Max 10 per row
+            num_rows = (num_products + cards_per_row - 1) // cards_per_row
 
-                group_width = cards_per_row * (self.card_width + self.gap_horizontal) - self.gap_horizontal
+            group_width = cards_per_row * (self.card_width + self.gap_horizontal) - self.gap_horizontal
 
-                print(f"  [{circle_idx+1}/{len(circles)}] {circle_name} ({num_products} products)")
+            async def create_header(_, circle_idx=circle_idx, circle_name=circle_name,
+                                    products=products, y=current_y, width=group_width):
+                print(f"  [{circle_idx+1}/{len(circles)}] {circle_name} ({len(products)} products)")
+                await self.create_circle_header(circle_name, products, self.start_x, y, width)
 
-                # Create circle header
-                await self.create_circle_header(
-                    session,
-                    circle_name,
-                    products,
-                    self.start_x,
-                    current_y,
-                    group_width
-                )
+            # Circle header (no image), queued ahead of its cards
+            items.append((None, create_header))
+            current_y += self.circle_header_height
 
-                current_y += self.circle_header_height
+            # Product cards
+            for idx, product in enumerate(products):
+                product['_circle_name'] = circle_name
+                row = idx // cards_per_row
+                col = idx % cards_per_row
 
-                # Create product cards
-                for idx, product in enumerate(products):
-                    row = idx // cards_per_row
-                    col = idx % cards_per_row
+                card_x = self.start_x + col * (self.card_width + self.gap_horizontal)
+                card_y = current_y + row * (self.card_height + self.gap_vertical)
 
-                    card_x = self.start_x + col * (self.card_width + self.gap_horizontal)
-                    card_y = current_y + row * (self.card_height + self.gap_vertical)
+                async def create_card(image_url, product=product, x=card_x, y=card_y):
+                    await self.create_product_card(product, x, y, image_url)
 
-                    image_url = image_urls.get(product['index'])
+                items.append((product.get('image_url', ''), create_card))
 
-                    await self.create_product_card(session, product, card_x, card_y, image_url)
+            # Move to next circle group
+            current_y += num_rows * (self.card_height + self.gap_vertical) + self.circle_gap
 
-                # Move to next circle group
-                current_y += num_rows * (self.card_height + self.gap_vertical) + self.circle_gap
+        await card_pipeline(items, self.upload_image_to_s3_async)
+        await self.writer.flush()
+        print(f"   Uploaded {self.stats['uploaded_images']}/{self.stats['total_products']} images to S3")
 
         print(f"\n   Created {len(circles)} circle groups on Miro!")
 
@@ -616,9 +409,17 @@ class CircleBoardUploader:
         print(f"   Total products: {self.stats['total_products']}")
         print(f"   Images uploaded: {self.stats['uploaded_images']}")
         print(f"   Images failed: {self.stats['failed_images']}")
+        if self.writer:
+            self.writer.print_stats()
+
+    async def upload_to_miro(self, csv_path: str, category_name: str = "",
+                             transfer: ImageTransfer = None) -> str:
+        """Main upload function, returns board URL; opens its own ImageTransfer unless one is shared"""
+        if transfer is None:
+            async with ImageTransfer() as transfer:
+                return await self.upload_to_miro(csv_path, category_name, transfer)
 
-    async def upload_to_miro(self, csv_path: str, category_name: str = "") -> str:
-        """Main upload function, returns board URL"""
+        self.transfer = transfer
         try:
             print(f"  Reading products from: {csv_path}")
             circles = self.read_product_csv(csv_path)
@@ -629,9 +430,10 @@ class CircleBoardUploader:
             board_name = f"Circle {short_cat} {datetime.now().strftime('%m/%d %H:%M')}"
             print(f"  Creating Miro board: {board_name}")
 
-            if not self.create_miro_board(board_name, f"Circle view for {category_name}"):
+            if not await self.create_miro_board(board_name, f"Circle view for {category_name}"):
                 return None
 
+            self.writer = MiroItemWriter(transfer.miro, self.board_id)
             await self.upload_products_by_circle(circles)
 
             self._display_stats()
@@ -5,7 +5,7 @@ DMM Crawler V2 Configuration
 # Browser settings
 HEADLESS_MODE = False  # Set True for headless browsing
 PAGE_LOAD_TIMEOUT = 30
-WAIT_TIME = 3
+WAIT_TIME = 3  # Minimum seconds between list page requests
 
 # User agent
 USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
@@ -15,3 +15,101 @@ AGE_VERIFY_BUTTON = "#\\:R6\\: > div.css-16bznt1 > div.css-1w77gwi > div.css-197
 
 # Default output directory
 DEFAULT_OUTPUT_DIR = 'data'
+
+# Detail/extra mode: number of Chrome drivers visiting product pages in parallel
+DETAIL_WORKERS = 1
+
+# Base mode list engine: 'selenium' (full browser) or 'http' (no browser, falls back to Selenium if JS-gated)
+CRAWL_ENGINE = 'selenium'
+HTTP_POOL_SIZE = 4
+
+# Cookies DMM sets once the age verification button is clicked
+AGE_CHECK_COOKIES = [
+    {'name': 'age_check_done', 'value': '1', 'domain': '.dmm.co.jp'},
+    {'name': 'age_check_done', 'value': '1', 'domain': '.dmm.com'},
+]
+
+# Readiness waits: maximum seconds per stage (each wait ends as soon as the page is ready)
+STAGE_TIMEOUTS = {
+    'age_verify': 5,        # Age verification button to appear
+    'age_verify_done': 5,   # Age gate to disappear after clicking
+    'list': 15,             # Product list container
+    'list_stable': 5,       # List item count to stop changing
+    'detail': 10,           # Product detail title
+    'extra': 5,             # Commentary / review widgets
+}
+DOM_STABLE_INTERVAL = 0.3  # Seconds the list item count must stay unchanged
+
+LIST_READY_SELECTOR = 'ul.productList, ul.fn-productList'
+DETAIL_READY_SELECTOR = 'h1.productTitle__txt'
+EXTRA_READY_SELECTOR = 'div.dcd-review__points, div.dcd-review__list, p.summary__txt'
+
+# Lean browser profile: skip assets the crawler never reads (DOM text and img src are still available)
+LEAN_PROFILE = False
+LEAN_BLOCKED_URLS = [
+    # Images, fonts and media
+    '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf',
+    '*.mp4', '*.webm', '*.m3u8', '*.mp3',
+    # Analytics and ads
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*googlesyndication.com*', '*facebook.net*', '*connect.facebook.com*',
+    '*twitter.com/i/adsct*', '*criteo.com*', '*yjtag.jp*', '*ads-twitter.com*',
+    '*analytics.yahoo.co.jp*', '*clarity.ms*', '*hotjar.com*',
+]
+
+# Multi-category crawls (--urls-file): categories crawled in parallel, one process and driver each
+CATEGORY_WORKERS = 1
+
+# List pages opened at once in separate browser tabs (request starts are still WAIT_TIME apart)
+LIST_TABS = 1
+
+# Saved browser session (cookies + localStorage) reused across runs; None disables it
+SESSION_FILE = None
+SESSION_MAX_AGE = 7 * 24 * 3600  # Seconds before a saved session is considered stale
+
+# Crawler service (crawler_service.py): long-lived worker the web UI submits jobs to
+SERVICE_HOST = '127.0.0.1'
+SERVICE_PORT = 8765
+SERVICE_CONCURRENCY = 1   # Jobs run at the same time (each holds one warm driver)
+SERVICE_MAX_JOBS = 200    # Finished jobs kept for status polling
+SERVICE_LOG_LINES = 2000  # Log lines kept per job
+
+# Detail page cache (detail / extra modes): SQLite file keyed by product_url; None disables it
+DETAIL_CACHE_FILE = None
+DETAIL_CACHE_STATIC_TTL = 30 * 24 * 3600  # Release date, format, pages, genres, circle...
+DETAIL_CACHE_VOLATILE_TTL = 20 * 3600     # Sales, favorites, rankings, campaign prices, reviews
+DETAIL_CACHE_MAX_ENTRIES = 50000          # Least recently used entries are evicted beyond this
+
+# Typed Parquet output next to the CSV (requires pyarrow); the uploaders read either format
+PARQUET_OUTPUT = False
+
+# Snapshot history (snapshot_store.py): SQLite file every crawl run is also recorded in; None disables it
+SNAPSHOT_DB = None
+
+# Structured review source (extra mode): paged review list fetched over HTTP with the browser's cookies
+# Template fields: {cid} = product id from the product URL, {page} = 1-based page number
+# The response may be an HTML fragment or JSON with the fragment under "html"; None keeps DOM-only reviews
+REVIEW_API_URL = None
+REVIEW_API_CONCURRENCY = 4  # Review pages requested at once per product
+REVIEW_API_MAX_PAGES = 50   # Safety cap on review pages per product
+
+# Raw HTML archive for offline re-parsing (reparse.py): zstd-compressed, deduplicated; None disables it
+HTML_ARCHIVE_DIR = None
+REPARSE_WORKERS = 4  # Processes used by reparse.py
+
+# Miro image upload stage (image_transfer.py): one pooled engine per upload run, shared by both boards
+IMAGE_DOWNLOAD_CONCURRENCY = 10  # Open connections for cover downloads
+IMAGE_DOWNLOAD_PER_HOST = 10     # Of which to a single image host
+IMAGE_S3_WORKERS = 8             # Threads (and S3 pool connections) running put_object
+MIRO_CONNECTIONS = 16            # Keep-alive connections to the Miro API (>= MIRO_MAX_CONCURRENCY)
+IMAGE_S3_PREFIX = 'dmm-images/'  # Content-addressed keys: {prefix}{sha256 of the source URL}.jpg
+IMAGE_MANIFEST_FILE = 'data/s3_image_manifest.json'  # Keys known to exist in the bucket; None always asks S3
+IMAGE_PIPELINE_QUEUE = 20        # Products with a ready image waiting for their Miro card
+MIRO_BULK_BATCH = 20             # Board items per Miro bulk create request (max 20)
+
+# Miro API client (miro_client.py): adaptive concurrency under the rate limit, retries on 429/5xx
+MIRO_CONCURRENCY = 4        # Requests in flight at start
+MIRO_MAX_CONCURRENCY = 16   # Upper bound while the limit allows
+MIRO_MAX_RETRIES = 5        # Retries per request (429, 5xx, connection errors)
+MIRO_RATE_RESERVE = 0.05    # Fraction of the rate-limit budget left unused before pausing
@@ -12,6 +12,10 @@ from datetime import datetime
 
 # Import the actual crawler
 from dmm_crawler import DMMCrawlerV2, crawl_multiple_urls
+from config import (
+    DETAIL_WORKERS, CRAWL_ENGINE, LEAN_PROFILE, LIST_TABS, SESSION_FILE, DETAIL_CACHE_FILE,
+    PARQUET_OUTPUT, SNAPSHOT_DB, REVIEW_API_URL, HTML_ARCHIVE_DIR
+)
 
 
 def parse_arguments():
@@ -23,6 +27,30 @@ def parse_arguments():
     parser.add_argument('--category', default='default', help='Category name')
     parser.add_argument('--mode', choices=['base', 'detail', 'extra'], required=True,
                        help='Crawl mode: base, detail, or extra')
+    parser.add_argument('--detail-workers', type=int, default=DETAIL_WORKERS,
+                       help='Parallel Chrome drivers for detail/extra pages')
+    parser.add_argument('--engine', choices=['selenium', 'http'], default=CRAWL_ENGINE,
+                       help='List page engine for base mode (http skips the browser)')
+    parser.add_argument('--lean', action='store_true', default=LEAN_PROFILE,
+                       help='Block images, fonts, media and trackers in Chrome')
+    parser.add_argument('--list-tabs', type=int, default=LIST_TABS,
+                       help='List pages loaded at once in separate browser tabs')
+    parser.add_argument('--session-file', default=SESSION_FILE,
+                       help='JSON file to save/restore the age-verified browser session')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continue from the checkpoint of an interrupted crawl')
+    parser.add_argument('--detail-cache', default=DETAIL_CACHE_FILE,
+                       help='SQLite file caching detail page results between runs')
+    parser.add_argument('--changed-only', action='store_true',
+                       help='Only visit detail pages of new products or products changed since the last CSV')
+    parser.add_argument('--parquet', action='store_true', default=PARQUET_OUTPUT,
+                       help='Also write a typed Parquet file next to the CSV (requires pyarrow)')
+    parser.add_argument('--snapshot-db', default=SNAPSHOT_DB,
+                       help='SQLite history database to record the run in (default: off)')
+    parser.add_argument('--review-api', default=REVIEW_API_URL,
+                       help='Review endpoint URL template with {cid} and {page} (extra mode)')
+    parser.add_argument('--html-archive', default=HTML_ARCHIVE_DIR,
+                       help='Directory to archive raw page HTML in for reparse.py (requires zstandard)')
     parser.add_argument('--miro-upload-circle', action='store_true',
                        help='Upload to Miro CIRCLE board')
     parser.add_argument('--miro-upload-ranks', action='store_true',
@@ -42,6 +70,18 @@ def main():
     print(f"Mode: {args.mode}")
     print(f"Pages: {args.pages}")
     print(f"Category: {args.category}")
+    print(f"Detail workers: {args.detail_workers}")
+    print(f"Engine: {args.engine}")
+    print(f"Lean browser: {args.lean}")
+    print(f"List tabs: {args.list_tabs}")
+    print(f"Session file: {args.session_file}")
+    print(f"Resume: {args.resume}")
+    print(f"Detail cache: {args.detail_cache}")
+    print(f"Changed only: {args.changed_only}")
+    print(f"Parquet: {args.parquet}")
+    print(f"Snapshot DB: {args.snapshot_db}")
+    print(f"Review API: {args.review_api}")
+    print(f"HTML archive: {args.html_archive}")
     print(f"Output: {args.output}")
     print(f"Miro CIRCLE upload: {args.miro_upload_circle}")
     print(f"Miro RANKS upload: {args.miro_upload_ranks}")
@@ -57,7 +97,19 @@ def main():
             url_dict=url_dict,
             max_pages=args.pages,
             output_dir=args.output,
-            mode=args.mode
+            mode=args.mode,
+            detail_workers=args.detail_workers,
+            engine=args.engine,
+            lean=args.lean,
+            list_tabs=args.list_tabs,
+            session_file=args.session_file,
+            resume=args.resume,
+            detail_cache=args.detail_cache,
+            changed_only=args.changed_only,
+            parquet=args.parquet,
+            snapshot_db=args.snapshot_db,
+            review_api=args.review_api,
+            html_archive=args.html_archive
         )
 
         if not results or args.category not in results:
@@ -75,6 +127,11 @@ def main():
 
         print(f"✓ Saved data to {csv_path}")
 
+        # Typed Parquet snapshot loads without re-parsing numbers when it was written
+        upload_path = csv_path
+        if args.parquet and csv_path.with_suffix('.parquet').exists():
+            upload_path = csv_path.with_suffix('.parquet')
+
         # Step 2: Upload to Miro if requested
         if args.miro_upload_circle or args.miro_upload_ranks:
             print("\n" + "=" * 60)
@@ -82,7 +139,7 @@ def main():
             print("=" * 60)
             print()
 
-            upload_to_miro(str(csv_path), args.category, args.miro_upload_circle, args.miro_upload_ranks)
+            upload_to_miro(str(upload_path), args.category, args.miro_upload_circle, args.miro_upload_ranks)
 
         print("\n" + "=" * 60)
         print("✓ Crawling completed successfully!")
@@ -99,13 +156,7 @@ def upload_to_miro(csv_path: str, category_name: str, upload_circle: bool, uploa
     """Upload CSV data to Miro boards"""
 
     try:
-        if upload_circle:
-            print(f"\n📤 Uploading to CIRCLE board...")
-            asyncio.run(upload_circle_board(csv_path, category_name))
-
-        if upload_ranks:
-            print(f"\n📤 Uploading to RANKS board...")
-            asyncio.run(upload_ranks_board(csv_path, category_name))
+        asyncio.run(upload_boards(csv_path, category_name, upload_circle, upload_ranks))
 
     except ImportError as e:
         print(f"  Error importing Miro uploaders: {e}")
@@ -116,12 +167,30 @@ def upload_to_miro(csv_path: str, category_name: str, upload_circle: bool, uploa
         traceback.print_exc()
 
 
-async def upload_ranks_board(csv_path: str, category_name: str):
+async def upload_boards(csv_path: str, category_name: str, upload_circle: bool, upload_ranks: bool):
+    """
+    Upload the requested boards concurrently in one event loop, sharing one image transfer engine
+    Both boards stream images through the same transfer, which uploads each image once
+    """
+    from image_transfer import ImageTransfer
+
+    async with ImageTransfer() as transfer:
+        boards = []
+        if upload_circle:
+            print(f"\n📤 Uploading to CIRCLE board...")
+            boards.append(upload_circle_board(csv_path, category_name, transfer))
+        if upload_ranks:
+            print(f"\n📤 Uploading to RANKS board...")
+            boards.append(upload_ranks_board(csv_path, category_name, transfer))
+        await asyncio.gather(*boards)
+
+
+async def upload_ranks_board(csv_path: str, category_name: str, transfer=None):
     """Upload to Miro with 20x6 grid layout"""
     try:
         from detail_board_uploader import DetailBoardUploader
         uploader = DetailBoardUploader()
-        board_url = await uploader.upload_to_miro(csv_path, category_name=category_name)
+        board_url = await uploader.upload_to_miro(csv_path, category_name=category_name, transfer=transfer)
         if board_url:
             print(f"  ✓ RANKS board created: {board_url}")
         else:
@@ -132,12 +201,12 @@ async def upload_ranks_board(csv_path: str, category_name: str):
         traceback.print_exc()
 
 
-async def upload_circle_board(csv_path: str, category_name: str):
+async def upload_circle_board(csv_path: str, category_name: str, transfer=None):
     """Upload to Miro grouped by circle"""
     try:
         from circle_board_uploader import CircleBoardUploader
         uploader = CircleBoardUploader()
-        board_url = await uploader.upload_to_miro(csv_path, category_name=category_name)
+        board_url = await uploader.upload_to_miro(csv_path, category_name=category_name, transfer=transfer)
         if board_url:
             print(f"  ✓ CIRCLE board created: {board_url}")
         else:
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+DMM Crawler Service
+Long-lived crawler worker with a local HTTP API
+Keeps warm, age-verified WebDrivers and a pooled HTTP session between jobs
+
+API:
+    POST /jobs          Submit a job (same options as crawler.py), returns {"id": ...}
+    GET  /jobs/<id>     Job status, result and log
+    GET  /jobs          All retained jobs (without logs)
+    GET  /health        Service status
+"""
+
+import sys
+import json
+import uuid
+import queue
+import threading
+import contextvars
+import traceback
+from pathlib import Path
+from datetime import datetime
+from collections import deque, OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from dmm_crawler import DMMCrawlerV2, create_chrome_driver
+from config import (
+    DEFAULT_OUTPUT_DIR, DETAIL_WORKERS, CRAWL_ENGINE, LEAN_PROFILE, LIST_TABS, SESSION_FILE,
+    PARQUET_OUTPUT,
+    SERVICE_HOST, SERVICE_PORT, SERVICE_CONCURRENCY, SERVICE_MAX_JOBS, SERVICE_LOG_LINES
+)
+
+
+# Job being run by the current thread; the crawler copies its context into the worker threads it
+# starts (detail pool, review fetcher), so their output reaches the same job log
+current_job = contextvars.ContextVar('current_job', default=None)
+
+
+class JobLogStream:
+    """sys.stdout replacement that also copies a job's output (from any of its threads) into that job's log"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        self.stream.write(text)
+        job = current_job.get()
+        if job:
+            job.append_log(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class CrawlJob:
+    """One crawl request and its progress"""
+
+    def __init__(self, params):
+        self.id = uuid.uuid4().hex[:12]
+        self.params = params
+        self.status = 'queued'  # queued, running, succeeded, failed
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+        self.log_lines = deque(maxlen=SERVICE_LOG_LINES)
+        self._partial_line = ''
+        self._lock = threading.Lock()
+
+    def append_log(self, text):
+        """Append printed text, keeping the last SERVICE_LOG_LINES lines"""
+        with self._lock:
+            lines = (self._partial_line + text).split('\n')
+            self._partial_line = lines.pop()
+            self.log_lines.extend(lines)
+
+    def to_dict(self, include_log=True):
+        """JSON-ready job status"""
+        data = {
+            'id': self.id,
+            'status': self.status,
+            'params': self.params,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'result': self.result,
+            'error': self.error
+        }
+        if include_log:
+            with self._lock:
+                data['log'] = '\n'.join(list(self.log_lines) + [self._partial_line])
+        return data
+
+
+class WarmDriverPool:
+    """Idle WebDrivers kept open between jobs"""
+
+    def __init__(self, lean=LEAN_PROFILE):
+        self.lean = lean
+        self.idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Return an idle driver, or start a new one"""
+        with self._lock:
+            if self.idle:
+                return self.idle.pop()
+        print("Starting a new WebDriver for the pool...")
+        return create_chrome_driver(lean=self.lean)
+
+    def release(self, driver):
+        """Return a driver to the pool if it still responds, otherwise quit it"""
+        try:
+            driver.current_url
+        except Exception:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            return
+
+        with self._lock:
+            self.idle.append(driver)
+
+    def close(self):
+        """Quit all idle drivers"""
+        with self._lock:
+            drivers, self.idle = self.idle, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+class CrawlerService:
+    """Job queue with a fixed number of worker threads sharing warm drivers"""
+
+    def __init__(self, concurrency=SERVICE_CONCURRENCY, lean=LEAN_PROFILE, session_file=SESSION_FILE):
+        self.concurrency = max(1, concurrency)
+        self.session_file = session_file
+        self.drivers = WarmDriverPool(lean=lean)
+        self.http_fetcher = None  # Created on the first HTTP-engine job
+
+        self.jobs = OrderedDict()
+        self.pending = queue.Queue()
+        self._lock = threading.Lock()
+
+        self.log_stream = JobLogStream(sys.stdout)
+        sys.stdout = self.log_stream
+
+        self.workers = [
+            threading.Thread(target=self._worker_loop, name=f'crawl-worker-{i + 1}', daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, params):
+        """Validate and queue a job"""
+        if not params.get('url'):
+            raise ValueError("Missing required field: url")
+        if params.get('mode', 'base') not in ('base', 'detail', 'extra'):
+            raise ValueError("Invalid mode. Must be 'base', 'detail', or 'extra'")
+
+        job = CrawlJob(params)
+        with self._lock:
+            self.jobs[job.id] = job
+            self._prune_jobs()
+        self.pending.put(job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self):
+        with self._lock:
+            return [job.to_dict(include_log=False) for job in self.jobs.values()]
+
+    def _prune_jobs(self):
+        """Forget the oldest finished jobs beyond SERVICE_MAX_JOBS"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in ('succeeded', 'failed')]
+        for job_id in finished[:max(0, len(self.jobs) - SERVICE_MAX_JOBS)]:
+            del self.jobs[job_id]
+
+    def _worker_loop(self):
+        while True:
+            job = self.pending.get()
+            token = current_job.set(job)
+            job.status = 'running'
+            job.started_at = datetime.now().isoformat()
+            try:
+                job.result = self._run_job(job)
+                job.status = 'succeeded'
+            except Exception as e:
+                job.error = str(e)
+                job.status = 'failed'
+                traceback.print_exc()
+            finally:
+                job.finished_at = datetime.now().isoformat()
+                current_job.reset(token)
+                self.pending.task_done()
+
+    def _get_http_fetcher(self):
+        with self._lock:
+            if self.http_fetcher is None:
+                from http_fetcher import HttpListFetcher
+                from session_store import SessionStore
+                store = SessionStore(self.session_file) if self.session_file else None
+                self.http_fetcher = HttpListFetcher(store)
+            return self.http_fetcher
+
+    def _run_job(self, job):
+        """Crawl (and optionally upload) one job; returns its result summary"""
+        params = job.params
+        mode = params.get('mode', 'base')
+        engine = params.get('engine', CRAWL_ENGINE)
+        category = params.get('category') or 'default'
+        output_dir = params.get('output') or DEFAULT_OUTPUT_DIR
+
+        uses_http = engine == 'http' and mode == 'base'
+        driver = None if uses_http else self.drivers.acquire()
+
+        print(f"Job {job.id}: {params['url']} ({mode} mode, {params.get('pages', 1)} page(s))")
+
+        try:
+            crawler = DMMCrawlerV2(
+                base_url=params['url'],
+                output_dir=output_dir,
+                category_name=category,
+                mode=mode,
+                detail_workers=int(params.get('detail_workers', DETAIL_WORKERS)),
+                engine=engine,
+                lean=self.drivers.lean,
+                list_tabs=int(params.get('list_tabs', LIST_TABS)),
+                session_file=self.session_file,
+                driver=driver,
+                http_fetcher=self._get_http_fetcher() if uses_http else None,
+                resume=bool(params.get('resume')),
+                changed_only=bool(params.get('changed_only')),
+                parquet=bool(params.get('parquet', PARQUET_OUTPUT))
+            )
+            crawler.run(max_pages=int(params.get('pages', 1)))
+        finally:
+            if driver:
+                self.drivers.release(driver)
+
+        if not crawler.product_count:
+            raise RuntimeError("No products found")
+
+        # Same naming convention as DMMCrawlerV2.save_to_csv: {category}_{date}.csv
+        csv_path = Path(output_dir) / f"{category}_{datetime.now().strftime('%Y-%m-%d')}.csv"
+        if not csv_path.exists():
+            raise RuntimeError(f"CSV file not found at {csv_path}")
+
+        upload_circle = bool(params.get('miro_upload_circle'))
+        upload_ranks = bool(params.get('miro_upload_ranks'))
+        if upload_circle or upload_ranks:
+            from crawler import upload_to_miro
+            parquet_path = csv_path.with_suffix('.parquet')
+            upload_path = parquet_path if crawler.parquet and parquet_path.exists() else csv_path
+            upload_to_miro(str(upload_path), category, upload_circle, upload_ranks)
+
+        return {
+            'products': crawler.product_count,
+            'csv_path': str(csv_path),
+            'metrics': crawler.metrics_summary
+        }
+
+    def close(self):
+        self.drivers.close()
+        if self.http_fetcher:
+            self.http_fetcher.close()
+        sys.stdout = self.log_stream.stream
+
+
+def make_handler(service):
+    """Build a request handler bound to a CrawlerService"""
+
+    class CrawlerRequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.rstrip('/')
+            if path == '/health':
+                self._send_json(200, {
+                    'status': 'ok',
+                    'workers': service.concurrency,
+                    'queued': service.pending.qsize(),
+                    'idle_drivers': len(service.drivers.idle)
+                })
+            elif path == '/jobs':
+                self._send_json(200, {'jobs': service.list_jobs()})
+            elif path.startswith('/jobs/'):
+                job = service.get(path[len('/jobs/'):])
+                if job:
+                    self._send_json(200, job.to_dict())
+                else:
+                    self._send_json(404, {'error': 'Job not found'})
+            else:
+                self._send_json(404, {'error': 'Not found'})
+
+        def do_POST(self):
+            if self.path.rstrip('/') != '/jobs':
+                self._send_json(404, {'error': 'Not found'})
+                return
+
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                params = json.loads(self.rfile.read(length) or b'{}')
+                job = service.submit(params)
+            except ValueError as e:
+                self._send_json(400, {'error': str(e)})
+                return
+
+            self._send_json(202, {'id': job.id, 'status': job.status})
+
+        def log_message(self, format, *args):
+            # Keep request logs out of job output
+            sys.__stderr__.write(f"[service] {self.address_string()} {format % args}\n")
+
+    return CrawlerRequestHandler
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='DMM Crawler Service')
+    parser.add_argument('--host', default=SERVICE_HOST, help='Address to listen on')
+    parser.add_argument('--port', type=int, default=SERVICE_PORT, help='Port to listen on')
+    parser.add_argument('--concurrency', type=int, default=SERVICE_CONCURRENCY, help='Jobs run at the same time')
+    parser.add_argument('--lean', action='store_true', default=LEAN_PROFILE,
+                        help='Block images, fonts, media and trackers in pooled drivers')
+    parser.add_argument('--session-file', default=SESSION_FILE,
+                        help='JSON file to save/restore the age-verified browser session')
+    args = parser.parse_args()
+
+    service = CrawlerService(concurrency=args.concurrency, lean=args.lean, session_file=args.session_file)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"✓ Crawler service listening on http://{args.host}:{args.port} ({service.concurrency} worker(s))")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⚠ Shutting down crawler service")
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
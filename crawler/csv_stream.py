@@ -0,0 +1,46 @@
+"""
+DMM CSV Stream Writer
+Writes the output CSV page by page while the crawl runs, so rows can be read before it finishes
+"""
+
+import os
+import csv
+from pathlib import Path
+
+
+class CsvStreamWriter:
+    """CSV file opened for the whole crawl; each page of rows is flushed and fsynced"""
+
+    def __init__(self, path, fieldnames):
+        self.path = Path(path)
+        self.fieldnames = fieldnames
+        self.count = 0
+        self.file = None
+        self.writer = None
+
+    def open(self):
+        """Create the file and write the header"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, 'w', encoding='utf-8', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames, extrasaction='ignore')
+        self.writer.writeheader()
+        self._sync()
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def write_rows(self, rows):
+        """Append rows and make them durable"""
+        self.writer.writerows(rows)
+        self._sync()
+        self.count += len(rows)
+
+    def close(self):
+        """Close the file; a CSV without any rows is removed"""
+        if not self.file:
+            return
+        self.file.close()
+        self.file = None
+        if self.count == 0:
+            self.path.unlink(missing_ok=True)
@@ -5,15 +5,15 @@ Optimized for dmm_crawler_v2 CSV format
 """
 
 import os
-import csv
 import asyncio
-import aiohttp
-import boto3
-import concurrent.futures
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 
+from product_table import load_card_products
+from image_transfer import ImageTransfer, card_pipeline
+from miro_writer import MiroItemWriter, text_box_item, image_item
+
 load_dotenv()
 
 
@@ -25,21 +25,9 @@ class DetailBoardUploader:
         if not self.miro_token:
             raise ValueError("MIRO_TOKEN not found in environment variables")
 
-        self.headers = {
-            'Authorization': f'Bearer {self.miro_token}',
-            'Content-Type': 'application/json'
-        }
-
-        # AWS S3 configuration
-        aws_config = {
-            'aws_access_key_id': os.getenv('AWS_ACCESS_KEY_ID'),
-            'aws_secret_access_key': os.getenv('AWS_SECRET_ACCESS_KEY'),
-            'region_name': os.getenv('S3_REGION', 'ap-northeast-2')
-        }
-
-        self.s3_bucket = os.getenv('S3_BUCKET_NAME')
-        self.s3_prefix = 'dmm-detail-images/'
-        self.s3 = boto3.client("s3", **aws_config)
+        # S3 client, image keys, HTTP sessions and the Miro client come from the run's ImageTransfer
+        self.transfer = None
+        self.writer = None  # Bulk item writer for the board being built
 
         self.board_id = None
 
@@ -60,203 +48,53 @@ class DetailBoardUploader:
             'failed_images': 0
         }
 
-    def create_miro_board(self, board_name: str, description: str = "") -> bool:
+    async def create_miro_board(self, board_name: str, description: str = "") -> bool:
         """Create a new Miro board"""
-        import requests
-
-        try:
-            board_payload = {
-                "name": board_name,
-                "description": description
-            }
-
-            response = requests.post(
-                "https://api.miro.com/v2/boards",
-                headers=self.headers,
-                json=board_payload
-            )
-
-            if response.status_code == 201:
-                board_data = response.json()
-                self.board_id = board_data["id"]
-                board_url = f"https://miro.com/app/board/{self.board_id}/"
-                print(f"  Miro board created: {board_name}")
-                print(f"  Board URL: {board_url}")
-                return True
-            else:
-                print(f"  Miro board creation failed: {response.status_code}")
-                print(f"Response: {response.text}")
-                return False
-
-        except Exception as e:
-            print(f"  Miro board creation exception: {e}")
+        board_id = await self.transfer.miro.create_board(board_name, description)
+        if not board_id:
             return False
 
+        self.board_id = board_id
+        board_url = f"https://miro.com/app/board/{self.board_id}/"
+        print(f"  Miro board created: {board_name}")
+        print(f"  Board URL: {board_url}")
+        return True
+
     def read_product_csv(self, csv_path: str) -> list:
-        """Read CSV and return products sorted by index"""
+        """Read a CSV or Parquet snapshot and return products sorted by index"""
         if not os.path.exists(csv_path):
             raise ValueError(f"CSV not found: {csv_path}")
 
         products = []
 
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                product_data = {
-                    # Base fields
-                    'index': int(row.get('index', 0)) if row.get('index', '').isdigit() else 0,
-                    'category': row.get('category', ''),
-                    'image_url': row.get('image_url', ''),
-                    'product_url': row.get('product_url', ''),
-                    'title': row.get('title', ''),
-                    'writer': row.get('writer', 'Unknown'),
-                    'genre': row.get('genre', ''),
-                    'is_exclusive': row.get('is_exclusive', '') == 'True',
-                    'discount': row.get('discount', ''),
-                    'sale_price': row.get('sale_price', ''),
-                    'original_price': row.get('original_price', ''),
-                    'copies_sold': row.get('copies_sold', '0'),
-                    'rating': row.get('rating', ''),
-                    'review_count': row.get('review_count', ''),
-                    # Detail fields
-                    'extra_info': row.get('extra_info', ''),  # Rankings
-                    'total_sales': row.get('total_sales', ''),
-                    'review_count_detail': row.get('review_count_detail', ''),
-                    'favorites': row.get('favorites', ''),
-                    'release_date': row.get('release_date', ''),
-                    'contents_meta': row.get('contents_meta', ''),
-                    'format': row.get('format', ''),
-                    'pages': row.get('pages', ''),
-                    'genres': row.get('genres', ''),
-                    'file_size': row.get('file_size', ''),
-                    'title_detail': row.get('title_detail', ''),
-                    'circle': row.get('circle', ''),
-                    'circle_fans': row.get('circle_fans', ''),
-                    'campaign_discount': row.get('campaign_discount', ''),
-                    'campaign_end_date': row.get('campaign_end_date', ''),
-                    'campaign_price': row.get('campaign_price', ''),
-                    'original_price_detail': row.get('original_price_detail', ''),
-                }
-
-                products.append(product_data)
-                self.stats['total_products'] += 1
+        # Values come back typed (ints, floats, bools) from CSV or Parquet
+        for product_data in load_card_products(csv_path):
+            products.append(product_data)
+            self.stats['total_products'] += 1
 
         products.sort(key=lambda x: x['index'])
         return products
 
-    async def upload_image_to_s3_async(self, image_url: str, s3_key: str) -> str:
-        """Download image from URL and upload to S3, return presigned URL"""
-        import aiohttp
-
-        try:
-            # Download image from DMM
-            async with aiohttp.ClientSession() as session:
-                async with session.get(image_url) as response:
-                    if response.status != 200:
-                        self.stats['failed_images'] += 1
-                        return None
-                    image_data = await response.read()
-
-            # Upload to S3
-            loop = asyncio.get_event_loop()
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                await loop.run_in_executor(
-                    executor,
-                    lambda: self.s3.put_object(
-                        Bucket=self.s3_bucket,
-                        Key=s3_key,
-                        Body=image_data,
-                        ContentType='image/jpeg'
-                    )
-                )
-
-            # Generate presigned URL (7 days)
-            presigned_url = self.s3.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': self.s3_bucket, 'Key': s3_key},
-                ExpiresIn=604800
-            )
-
+    async def upload_image_to_s3_async(self, image_url: str) -> str:
+        """Upload image to S3 through the shared transfer (skipped if already there), return presigned URL"""
+        presigned_url = await self.transfer.upload(image_url)
+        if presigned_url:
             self.stats['uploaded_images'] += 1
-            return presigned_url
-
-        except Exception as e:
-            print(f"    S3 upload failed: {e}")
+        else:
             self.stats['failed_images'] += 1
-            return None
-
-    async def create_text_box(self, session: aiohttp.ClientSession, text: str,
-                             x: float, y: float, width: float, height: float,
-                             fill_color: str = "#ffffff", font_size: int = 12, bold: bool = False) -> bool:
-        """Create a text box on Miro board"""
-        url = f"https://api.miro.com/v2/boards/{self.board_id}/shapes"
-
-        content = f"<p><strong>{text}</strong></p>" if bold else f"<p>{text}</p>"
-
-        payload = {
-            "data": {
-                "content": content,
-                "shape": "rectangle"
-            },
-            "style": {
-                "fillColor": fill_color
-            },
-            "position": {
-                "x": x,
-                "y": y
-            },
-            "geometry": {
-                "width": width,
-                "height": height
-            }
-        }
-
-        try:
-            async with session.post(url, headers=self.headers, json=payload) as response:
-                if response.status not in [200, 201]:
-                    error_text = await response.text()
-                    print(f"    Text box failed ({response.status}): {error_text[:100]}")
-                return response.status in [200, 201]
-        except Exception as e:
-            print(f"    Text box exception: {e}")
-            return False
-
-    async def add_image_to_board(self, session: aiohttp.ClientSession, image_url: str,
-                                x: float, y: float, width: float, title: str = "") -> bool:
-        """Add image to Miro board"""
-        url = f"https://api.miro.com/v2/boards/{self.board_id}/images"
-        payload = {
-            "data": {
-                "url": image_url,
-                "title": title
-            },
-            "position": {
-                "x": x,
-                "y": y
-            },
-            "geometry": {
-                "width": width
-            }
-        }
+        return presigned_url
 
-        try:
-            async with session.post(url, headers=self.headers, json=payload) as response:
-                return response.status in [200, 201]
-        except Exception as e:
-            return False
-
-    async def create_product_card(self, session: aiohttp.ClientSession, product: dict,
+    async def create_product_card(self, product: dict,
                                  card_x: float, card_y: float, image_url: str = None):
         """Create a product card - works with base, detail, or extra mode data"""
-        tasks = []
+        items = []
 
         center_x = card_x + self.card_width / 2
         current_y = card_y
 
         # 1. Rank badge
-        tasks.append(
-            self.create_text_box(
-                session,
+        items.append(
+            text_box_item(
                 f"#{product['index']}",
                 center_x,
                 current_y + 15,
@@ -271,9 +109,8 @@ class DetailBoardUploader:
         # 2. Product image
         current_y += 35
         if image_url:
-            tasks.append(
-                self.add_image_to_board(
-                    session,
+            items.append(
+                image_item(
                     image_url,
                     center_x,
                     current_y + self.image_height / 2,
@@ -286,9 +123,8 @@ class DetailBoardUploader:
         # 3. Title (use title_detail if available from detail mode, otherwise title from base)
         title_text = product.get('title_detail') or product.get('title', '')
         title_text = title_text[:35] + "..." if len(title_text) > 35 else title_text
-        tasks.append(
-            self.create_text_box(
-                session,
+        items.append(
+            text_box_item(
                 title_text,
                 center_x,
                 current_y,
@@ -305,9 +141,8 @@ class DetailBoardUploader:
         writer = product.get('circle') or product.get('writer', '')
         if writer:
             writer_text = writer[:25] + "..." if len(writer) > 25 else writer
-            tasks.append(
-                self.create_text_box(
-                    session,
+            items.append(
+                text_box_item(
                     f"  {writer_text}",
                     center_x,
                     current_y,
@@ -333,9 +168,8 @@ class DetailBoardUploader:
             price_text += f" ← {original_price}円"
 
         if price_text:
-            tasks.append(
-                self.create_text_box(
-                    session,
+            items.append(
+                text_box_item(
                     price_text,
                     center_x,
                     current_y,
@@ -350,9 +184,8 @@ class DetailBoardUploader:
         current_y += 20
         sales = product.get('total_sales') or product.get('copies_sold', '')
         if sales:
-            tasks.append(
-                self.create_text_box(
-                    session,
+            items.append(
+                text_box_item(
                     f"  {sales}부 판매",
                     center_x,
                     current_y,
@@ -379,9 +212,8 @@ class DetailBoardUploader:
             rating_text += f" | ❤️ {favorites}"
 
         if rating_text.strip():
-            tasks.append(
-                self.create_text_box(
-                    session,
+            items.append(
+                text_box_item(
                     rating_text,
                     center_x,
                     current_y,
@@ -402,9 +234,8 @@ class DetailBoardUploader:
                 info_parts.append(f"  {release_date}")
             if pages:
                 info_parts.append(f"  {pages}p")
-            tasks.append(
-                self.create_text_box(
-                    session,
+            items.append(
+                text_box_item(
                     " | ".join(info_parts),
                     center_x,
                     current_y,
@@ -419,9 +250,8 @@ class DetailBoardUploader:
         extra_info = product.get('extra_info', '')
         if extra_info:
             current_y += 20
-            tasks.append(
-                self.create_text_box(
-                    session,
+            items.append(
+                text_box_item(
                     f"  {extra_info[:40]}",
                     center_x,
                     current_y,
@@ -434,9 +264,8 @@ class DetailBoardUploader:
 
         # 10. Exclusive badge
         if product.get('is_exclusive'):
-            tasks.append(
-                self.create_text_box(
-                    session,
+            items.append(
+                text_box_item(
                     "전매",
                     card_x + self.card_width - 30,
                     card_y + 15,
@@ -448,7 +277,7 @@ class DetailBoardUploader:
                 )
             )
 
-        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.writer.add(items)
 
     async def upload_products_grid_view(self, products: list):
         """Upload products in 20x6 grid to Miro"""
@@ -456,47 +285,32 @@ class DetailBoardUploader:
         print(f"   Total products: {len(products)}")
         print(f"   Layout: {self.cards_per_row} columns x {(len(products) + self.cards_per_row - 1) // self.cards_per_row} rows\n")
 
-        # Step 1: Upload images to S3
-        print("  Step 1: Uploading images to S3...")
-
-        image_urls = {}
-        semaphore = asyncio.Semaphore(10)
+        # Images stream to S3 while cards are created; each card is placed as soon as its image is ready
+        print("  Uploading images and creating product cards on Miro...")
 
-        async def upload_with_semaphore(idx, product):
-            async with semaphore:
-                image_url = product.get('image_url', '')
-                if not image_url:
-                    return
+        items = []
+        created = 0
 
-                s3_key = f"{self.s3_prefix}{product['category']}/product_{product['index']}.jpg"
-                url = await self.upload_image_to_s3_async(image_url, s3_key)
-                if url:
-                    image_urls[idx] = url
+        for idx, product in enumerate(products):
+            row = idx // self.cards_per_row
+            col = idx % self.cards_per_row
 
-        upload_tasks = [upload_with_semaphore(idx, product) for idx, product in enumerate(products)]
-        await asyncio.gather(*upload_tasks, return_exceptions=True)
-        print(f"   Uploaded {len(image_urls)}/{len(products)} images to S3\n")
+            card_x = self.start_x + col * (self.card_width + self.gap_horizontal)
+            card_y = self.start_y + row * (self.card_height + self.gap_vertical)
 
-        # Step 2: Create Miro cards
-        print("  Step 2: Creating product cards on Miro...")
+            async def create_card(image_url, product=product, x=card_x, y=card_y):
+                nonlocal created
+                await self.create_product_card(product, x, y, image_url)
+                created += 1
 
-        async with aiohttp.ClientSession() as session:
-            for idx, product in enumerate(products):
-                row = idx // self.cards_per_row
-                col = idx % self.cards_per_row
+                if created % 20 == 0 or created == len(products):
+                    print(f"  [{created}/{len(products)}] Creating cards...")
 
-                card_x = self.start_x + col * (self.card_width + self.gap_horizontal)
-                card_y = self.start_y + row * (self.card_height + self.gap_vertical)
+            items.append((product.get('image_url', ''), create_card))
 
-                image_url = image_urls.get(idx)
-
-                if (idx + 1) % 20 == 0 or idx == len(products) - 1:
-                    print(f"  [{idx+1}/{len(products)}] Creating cards...")
-
-                await self.create_product_card(session, product, card_x, card_y, image_url)
-
-                # Small delay to avoid rate limiting
-                await asyncio.sleep(0.1)
+        await card_pipeline(items, self.upload_image_to_s3_async)
+        await self.writer.flush()
+        print(f"   Uploaded {self.stats['uploaded_images']}/{len(products)} images to S3")
 
         print(f"\n   Created {len(products)} product cards on Miro!")
 
@@ -506,9 +320,17 @@ class DetailBoardUploader:
         print(f"   Total products: {self.stats['total_products']}")
         print(f"   Images uploaded: {self.stats['uploaded_images']}")
         print(f"   Images failed: {self.stats['failed_images']}")
+        if self.writer:
+            self.writer.print_stats()
+
+    async def upload_to_miro(self, csv_path: str, category_name: str = "",
+                             transfer: ImageTransfer = None) -> str:
+        """Main upload function, returns board URL; opens its own ImageTransfer unless one is shared"""
+        if transfer is None:
+            async with ImageTransfer() as transfer:
+                return await self.upload_to_miro(csv_path, category_name, transfer)
 
-    async def upload_to_miro(self, csv_path: str, category_name: str = "") -> str:
-        """Main upload function, returns board URL"""
+        self.transfer = transfer
         try:
             print(f"  Reading products from: {csv_path}")
             products = self.read_product_csv(csv_path)
@@ -519,9 +341,10 @@ class DetailBoardUploader:
             board_name = f"{short_category} - {datetime.now().strftime('%m/%d %H:%M')}"
             print(f"  Creating Miro board: {board_name}")
 
-            if not self.create_miro_board(board_name, f"Detail view for {category_name}"):
+            if not await self.create_miro_board(board_name, f"Detail view for {category_name}"):
                 return None
 
+            self.writer = MiroItemWriter(transfer.miro, self.board_id)
             await self.upload_products_grid_view(products)
 
             self._display_stats()
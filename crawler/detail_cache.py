@@ -0,0 +1,150 @@
+"""
+DMM Detail Cache
+SQLite cache of detail / extra page results keyed by product_url
+Static fields (release date, format, circle...) and volatile fields (sales, favorites,
+campaign prices...) expire separately; least recently used entries are evicted past a size limit
+"""
+
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+from config import DETAIL_CACHE_STATIC_TTL, DETAIL_CACHE_VOLATILE_TTL, DETAIL_CACHE_MAX_ENTRIES
+from product_parser import DETAIL_FIELDS
+
+
+# Detail fields that change between daily crawls; everything else in DETAIL_FIELDS is static
+VOLATILE_DETAIL_FIELDS = [
+    'extra_info', 'total_sales', 'review_count_detail', 'favorites', 'circle_fans',
+    'campaign_discount', 'campaign_end_date', 'campaign_price', 'original_price_detail'
+]
+STATIC_DETAIL_FIELDS = [f for f in DETAIL_FIELDS if f not in VOLATILE_DETAIL_FIELDS]
+
+
+class DetailCache:
+    """product_url -> detail / extra fields, shared by detail pool threads"""
+
+    def __init__(self, path, static_ttl=DETAIL_CACHE_STATIC_TTL, volatile_ttl=DETAIL_CACHE_VOLATILE_TTL,
+                 max_entries=DETAIL_CACHE_MAX_ENTRIES):
+        self.path = Path(path)
+        self.static_ttl = static_ttl
+        self.volatile_ttl = volatile_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # One connection for all threads; parallel category processes each open their own
+        self.conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS details (
+                    product_url TEXT PRIMARY KEY,
+                    static_json TEXT,
+                    static_at REAL,
+                    volatile_json TEXT,
+                    volatile_at REAL,
+                    extra_json TEXT,
+                    extra_at REAL,
+                    last_used REAL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS details_last_used ON details (last_used)")
+
+    def _fresh(self, saved_at, ttl, now):
+        return saved_at is not None and now - saved_at <= ttl
+
+    def _row(self, product_url):
+        return self.conn.execute(
+            "SELECT static_json, static_at, volatile_json, volatile_at, extra_json, extra_at "
+            "FROM details WHERE product_url = ?", (product_url,)
+        ).fetchone()
+
+    def _touch(self, product_url, now):
+        self.conn.execute("UPDATE details SET last_used = ? WHERE product_url = ?", (now, product_url))
+
+    def get_detail(self, product_url):
+        """
+        Look up cached detail fields
+        Returns (detail, static): detail is every DETAIL_FIELDS value when both parts are fresh,
+        otherwise None; static is the still-fresh static part (fallback if the refresh visit fails) or None
+        """
+        now = time.time()
+        with self._lock, self.conn:
+            row = self._row(product_url)
+            if not row:
+                self.misses += 1
+                return None, None
+
+            static_json, static_at, volatile_json, volatile_at = row[:4]
+            static = json.loads(static_json) if self._fresh(static_at, self.static_ttl, now) else None
+            if static is None:
+                self.misses += 1
+                return None, None
+
+            self._touch(product_url, now)
+            if not self._fresh(volatile_at, self.volatile_ttl, now):
+                self.misses += 1
+                return None, static
+
+            self.hits += 1
+            return {**static, **json.loads(volatile_json)}, static
+
+    def get_extra(self, product_url):
+        """Cached extra fields, or None if missing or older than the volatile TTL"""
+        now = time.time()
+        with self._lock, self.conn:
+            row = self._row(product_url)
+            if not row or not row[4] or not self._fresh(row[5], self.volatile_ttl, now):
+                return None
+            self._touch(product_url, now)
+            return json.loads(row[4])
+
+    def put_detail(self, product_url, detail):
+        """Store detail fields from a fresh detail page visit"""
+        now = time.time()
+        static = json.dumps({k: detail.get(k) for k in STATIC_DETAIL_FIELDS}, ensure_ascii=False)
+        volatile = json.dumps({k: detail.get(k) for k in VOLATILE_DETAIL_FIELDS}, ensure_ascii=False)
+
+        with self._lock, self.conn:
+            self.conn.execute("""
+                INSERT INTO details (product_url, static_json, static_at, volatile_json, volatile_at, last_used)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(product_url) DO UPDATE SET
+                    static_json = excluded.static_json, static_at = excluded.static_at,
+                    volatile_json = excluded.volatile_json, volatile_at = excluded.volatile_at,
+                    last_used = excluded.last_used
+            """, (product_url, static, now, volatile, now, now))
+
+    def put_extra(self, product_url, extra):
+        """Store extra fields (only for URLs that already have a detail entry)"""
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE details SET extra_json = ?, extra_at = ?, last_used = ? WHERE product_url = ?",
+                (json.dumps(extra, ensure_ascii=False), now, now, product_url)
+            )
+
+    def evict(self):
+        """Drop least recently used entries beyond max_entries; returns the number removed"""
+        with self._lock, self.conn:
+            count = self.conn.execute("SELECT COUNT(*) FROM details").fetchone()[0]
+            excess = count - self.max_entries
+            if excess <= 0:
+                return 0
+            self.conn.execute(
+                "DELETE FROM details WHERE product_url IN "
+                "(SELECT product_url FROM details ORDER BY last_used LIMIT ?)", (excess,)
+            )
+            return excess
+
+    def close(self):
+        """Evict down to the size limit and close the database"""
+        removed = self.evict()
+        print(f"✓ Detail cache: {self.hits} hit(s), {self.misses} miss(es)"
+              + (f", {removed} old entries evicted" if removed else ""))
+        with self._lock:
+            self.conn.close()
@@ -4,58 +4,302 @@ Extracts product information from DMM list pages
 """
 
 import time
-import csv
-import re
+import queue
+import contextvars
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
 from config import (
     HEADLESS_MODE, PAGE_LOAD_TIMEOUT, WAIT_TIME,
-    USER_AGENT, AGE_VERIFY_BUTTON, DEFAULT_OUTPUT_DIR
+    USER_AGENT, AGE_VERIFY_BUTTON, DEFAULT_OUTPUT_DIR, DETAIL_WORKERS, CRAWL_ENGINE,
+    LIST_READY_SELECTOR, DETAIL_READY_SELECTOR, EXTRA_READY_SELECTOR,
+    LEAN_PROFILE, LEAN_BLOCKED_URLS, CATEGORY_WORKERS, LIST_TABS, SESSION_FILE, DETAIL_CACHE_FILE,
+    PARQUET_OUTPUT, SNAPSHOT_DB, REVIEW_API_URL, HTML_ARCHIVE_DIR
 )
+from product_parser import (
+    parse_price, parse_sales, parse_review_count, build_product, build_detail, build_extra,
+    parse_list_html, parse_product_page, fields_for_mode, LIST_ITEM_SELECTOR, DETAIL_FIELDS, EXTRA_FIELDS
+)
+from js_extractors import LIST_ITEMS_JS, DETAIL_INFO_JS, EXTRA_INFO_JS
+from readiness import ReadinessWaiter
+from throttle import RequestThrottle
+from session_store import SessionStore, apply_cookies
+from checkpoint import CrawlCheckpoint
+from csv_stream import CsvStreamWriter
+from product_table import ParquetStreamWriter
+from snapshot_store import SnapshotStore
+from review_fetcher import ReviewFetcher
+from html_archive import HtmlArchive
+from metrics import CrawlMetrics
+from detail_cache import DetailCache
+from snapshot_diff import find_previous_csv, load_previous_products, changed_fields, carry_forward
+
+
+def create_chrome_driver(lean=LEAN_PROFILE):
+    """Create a Chrome WebDriver with anti-detection"""
+    options = webdriver.ChromeOptions()
+
+    if HEADLESS_MODE:
+        options.add_argument('--headless')
+
+    # Anti-detection
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    options.add_argument(f'--user-agent={USER_AGENT}')
+
+    if lean:
+        # Return from driver.get at DOMContentLoaded; readiness waits cover the rest
+        options.page_load_strategy = 'eager'
+        options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2
+        })
+
+    driver = webdriver.Chrome(options=options)
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+
+    # Hide webdriver property
+    driver.execute_cdp_cmd('Network.setUserAgentOverride', {"userAgent": USER_AGENT})
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+    if lean:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URLS})
+
+    return driver
 
 
 class DMMCrawlerV2:
     """DMM Crawler V2 - Supports base, detail, and extra modes"""
 
-    def __init__(self, base_url, output_dir=DEFAULT_OUTPUT_DIR, category_name=None, mode='base'):
+    def __init__(self, base_url, output_dir=DEFAULT_OUTPUT_DIR, category_name=None, mode='base',
+                 detail_workers=DETAIL_WORKERS, engine=CRAWL_ENGINE, lean=LEAN_PROFILE,
+                 throttle=None, list_tabs=LIST_TABS, session_file=SESSION_FILE,
+                 driver=None, http_fetcher=None, resume=False,
+                 detail_cache=DETAIL_CACHE_FILE, changed_only=False, parquet=PARQUET_OUTPUT,
+                 snapshot_db=SNAPSHOT_DB, review_api=REVIEW_API_URL, html_archive=HTML_ARCHIVE_DIR):
         self.base_url = base_url
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.category_name = category_name
         self.mode = mode  # 'base', 'detail', 'extra'
-
-        self.driver = None
-        self.products = []
+        self.detail_workers = max(1, detail_workers)
+        self.lean = lean  # Block images/fonts/media/trackers and use the eager page load strategy
+        self.list_tabs = max(1, list_tabs)  # List pages loaded concurrently in browser tabs
+
+        # HTTP engine only covers list pages, so it is limited to base mode
+        if engine == 'http' and mode != 'base':
+            print(f"⚠ HTTP engine only supports base mode, using Selenium for {mode} mode")
+            engine = 'selenium'
+        self.engine = engine
+
+        # A driver / HTTP session passed in (e.g. a warm one from crawler_service) is not closed by run()
+        self.driver = driver
+        self.owns_driver = driver is None
+        self.http_fetcher = None
+        self.shared_http_fetcher = http_fetcher
+
+        self.detail_drivers = []  # Pool for parallel detail visits (includes self.driver)
+        self.product_count = 0  # Products written to the CSV so far (also the global index base)
+        self.csv_stream = None
+        self.parquet = parquet  # Also write a typed {category}_{date}.parquet
+        self.parquet_stream = None
+        self.snapshot_db = snapshot_db  # History database every run is added to
+        self.snapshot_store = None
+        self.snapshot_run = None  # (run_id, crawled_at)
         self.age_verified = False
 
-    def setup_driver(self):
-        """Initialize Chrome WebDriver with anti-detection"""
-        options = webdriver.ChromeOptions()
+        # Saved age-verified session (cookies + localStorage) reused across runs
+        self.session_store = SessionStore(session_file) if session_file else None
+        self.session_restored = False
+        self.session_checked = False
+        self.dismiss_popups = True  # First detail page of a new session may show a popup
 
-        if HEADLESS_MODE:
-            options.add_argument('--headless')
+        if driver is not None:
+            # Treat a reused driver like a restored session: checked against the age gate on page 1
+            self.session_restored = True
+            self.age_verified = True
+            self.dismiss_popups = False
 
-        # Anti-detection
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        options.add_argument(f'--user-agent={USER_AGENT}')
+        # Append-only JSONL of completed products; --resume skips work already recorded there
+        # (named by category and mode, not date, so a crawl interrupted before midnight still resumes)
+        self.resume = resume
+        self.checkpoint = CrawlCheckpoint(
+            self.output_dir / f"{self.category_name or 'default'}_{mode}.checkpoint.jsonl"
+        )
+        self.resumed_pages = {}  # page_num -> products of pages completed in an earlier run
+        self.resumed_by_url = {}  # product_url -> completed product from an earlier run
+        self.current_page = None
+        self.incomplete_pages = set()  # Pages with failed detail visits, left for --resume
+
+        # Cached detail / extra results from earlier crawls (detail and extra modes only)
+        self.detail_cache = DetailCache(detail_cache) if detail_cache and mode in ('detail', 'extra') else None
+
+        # Only revisit detail pages of products that are new or whose list-level numbers changed
+        self.changed_only = changed_only and mode in ('detail', 'extra')
+        self.previous_by_url = {}  # product_url -> row of the previous CSV snapshot
+
+        # Full review lists from the review endpoint (extra mode); DOM reviews are only the first page
+        self.review_fetcher = ReviewFetcher(review_api) if review_api and mode == 'extra' else None
+
+        # Raw list / product page HTML kept for offline re-parsing (reparse.py)
+        self.html_archive_dir = html_archive
+        self.html_archive = None
+
+        self.readiness = ReadinessWaiter()
+        self.metrics = CrawlMetrics()  # Phase timings, written next to the CSV
+        self.metrics_summary = None
+        # Minimum interval between list page requests (may be shared with other crawler processes)
+        self.throttle = throttle or RequestThrottle(WAIT_TIME)
+
+    def output_basename(self):
+        """Output file name without extension: {category}_{date}"""
+        timestamp = datetime.now().strftime('%Y-%m-%d')
+        return f"{self.category_name or 'default'}_{timestamp}"
+
+    def open_checkpoint(self):
+        """Open the checkpoint, loading completed pages and products when resuming"""
+        if self.resume:
+            products_by_page, done_pages = self.checkpoint.load()
+            for page_num, products in products_by_page.items():
+                ordered = sorted(products.values(), key=lambda p: p.get('index') or 0)
+                if page_num in done_pages:
+                    self.resumed_pages[page_num] = ordered
+                for product in ordered:
+                    if product.get('product_url'):
+                        self.resumed_by_url[product['product_url']] = product
+
+            print(f"✓ Resuming from {self.checkpoint.path}: {len(self.resumed_pages)} page(s), "
+                  f"{len(self.resumed_by_url)} product(s) already done")
+
+        self.checkpoint.open(resume=self.resume)
+
+    def load_previous_snapshot(self):
+        """Load the latest earlier CSV of this category for --changed-only crawls"""
+        previous_csv = find_previous_csv(self.output_dir, self.category_name)
+        if not previous_csv:
+            print("⚠ No previous snapshot found, visiting every detail page")
+            return
 
-        self.driver = webdriver.Chrome(options=options)
-        self.driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        self.previous_by_url = load_previous_products(previous_csv, self.mode)
+        if self.previous_by_url:
+            print(f"✓ Previous snapshot {previous_csv.name}: {len(self.previous_by_url)} products with detail info")
+        else:
+            print(f"⚠ Previous snapshot {previous_csv.name} has no {self.mode} fields, visiting every detail page")
 
-        # Hide webdriver property
-        self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {"userAgent": USER_AGENT})
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    def open_html_archive(self):
+        """Start this run's HTML archive manifest"""
+        if not self.html_archive_dir:
+            return
+        try:
+            self.html_archive = HtmlArchive(self.html_archive_dir)
+            self.html_archive.open_run(self.category_name or 'default', self.mode, self.base_url)
+        except ImportError:
+            print("⚠ HTML archive needs zstandard (pip install zstandard), archiving disabled")
+            self.html_archive = None
+
+    def archive_html(self, kind, url, html, **meta):
+        """Add a page's HTML to the archive ('list' or 'product')"""
+        if not self.html_archive or not html:
+            return
+        try:
+            self.html_archive.store(kind, url, html, **meta)
+        except Exception as e:
+            print(f"    ⚠ Could not archive {kind} page: {e}")
 
+    def archive_driver_page(self, driver, kind, url, **meta):
+        """Add the driver's current page to the archive (one page_source round trip, only when enabled)"""
+        if not self.html_archive:
+            return
+        try:
+            html = driver.page_source
+        except Exception as e:
+            print(f"    ⚠ Could not archive {kind} page: {e}")
+            return
+        self.archive_html(kind, url, html, **meta)
+
+    def create_driver(self):
+        """Create a Chrome WebDriver with this crawler's browser profile"""
+        return create_chrome_driver(lean=self.lean)
+
+    def setup_driver(self):
+        """Initialize the main Chrome WebDriver"""
+        with self.metrics.phase('setup_driver'):
+            self.driver = self.create_driver()
         print("✓ WebDriver initialized")
 
+        if self.session_store and self.session_store.restore(self.driver):
+            print("✓ Restored saved session, skipping age verification")
+            self.session_restored = True
+            self.age_verified = True
+            self.dismiss_popups = False
+
+    def check_restored_session(self):
+        """Make sure a restored session really is past the age gate, otherwise verify again"""
+        self.session_checked = True
+        if 'age_check' in self.driver.current_url or self.driver.find_elements(By.CSS_SELECTOR, AGE_VERIFY_BUTTON):
+            print("⚠ Saved session was not accepted, verifying age again")
+            self.age_verified = False
+            self.dismiss_popups = True
+            self.click_age_verification()
+
+    def save_session(self):
+        """Save the current age-verified browser session for the next run"""
+        if not (self.session_store and self.driver and self.age_verified):
+            return
+        try:
+            self.session_store.save(self.driver)
+        except Exception as e:
+            print(f"⚠ Could not save session: {e}")
+
+    def setup_detail_pool(self):
+        """Start extra WebDrivers for detail visits, sharing the age-verified session cookies"""
+        if self.detail_drivers:
+            return
+
+        self.detail_drivers = [self.driver]
+        if self.detail_workers == 1:
+            return
+
+        print(f"Starting {self.detail_workers - 1} extra WebDriver(s) for detail pages...")
+        cookies = self.driver.get_cookies()
+
+        for _ in range(self.detail_workers - 1):
+            try:
+                driver = self.create_driver()
+                apply_cookies(driver, cookies)
+                self.detail_drivers.append(driver)
+            except Exception as e:
+                print(f"⚠ Could not start detail WebDriver: {e}")
+                break
+
+        print(f"✓ Detail pool ready ({len(self.detail_drivers)} drivers)")
+
+    def close_drivers(self):
+        """Quit the main WebDriver and any detail pool drivers"""
+        for driver in self.detail_drivers:
+            if driver is not self.driver:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+        self.detail_drivers = []
+
+        if self.driver and self.owns_driver:
+            self.driver.quit()
+            print("\n✓ WebDriver closed")
+        self.driver = None
+
+    def close_http_fetcher(self):
+        """Close the HTTP session unless it was passed in"""
+        if self.http_fetcher and self.http_fetcher is not self.shared_http_fetcher:
+            self.http_fetcher.close()
+        self.http_fetcher = None
+
     def click_age_verification(self):
         """Click age verification button if present"""
         if self.age_verified:
@@ -63,54 +307,33 @@ class DMMCrawlerV2:
 
         try:
             print("Looking for age verification button...")
-            button = WebDriverWait(self.driver, 5).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, AGE_VERIFY_BUTTON))
-            )
+            button = self.readiness.wait_for_selector(self.driver, 'age_verify', AGE_VERIFY_BUTTON, clickable=True)
+            if not button:
+                print("⚠ No age verification button found (page already accessible)")
+                self.age_verified = True
+                self.save_session()
+                return
+
             button.click()
             print("✓ Age verification button clicked!")
-            time.sleep(3)
-            self.age_verified = True
-        except TimeoutException:
-            print("⚠ No age verification button found (page already accessible)")
+            # Continue as soon as the age gate is gone and the real page has started rendering
+            self.readiness.wait_until_gone(self.driver, 'age_verify_done', AGE_VERIFY_BUTTON)
             self.age_verified = True
+            self.save_session()
         except Exception as e:
             print(f"⚠ Could not click age verification button: {e}")
 
     def parse_price(self, price_text):
         """Parse price text to integer (e.g., '792엔' -> 792, '1,320円' -> 1320)"""
-        if not price_text:
-            return None
-        # Remove currency symbols and commas
-        cleaned = re.sub(r'[엔円,\s]', '', price_text)
-        try:
-            return int(cleaned)
-        except ValueError:
-            return None
+        return parse_price(price_text)
 
     def parse_sales(self, sales_text):
         """Parse sales text to integer (e.g., '판매수: 13,840' -> 13840)"""
-        if not sales_text:
-            return None
-        # Extract number part
-        match = re.search(r'[\d,]+', sales_text)
-        if match:
-            try:
-                return int(match.group().replace(',', ''))
-            except ValueError:
-                return None
-        return None
+        return parse_sales(sales_text)
 
     def parse_review_count(self, review_text):
         """Parse review count (e.g., '(21건)' -> 21)"""
-        if not review_text:
-            return None
-        match = re.search(r'\d+', review_text)
-        if match:
-            try:
-                return int(match.group())
-            except ValueError:
-                return None
-        return None
+        return parse_review_count(review_text)
 
     def extract_product(self, li_element, index):
         """Extract product information from a single list item"""
@@ -240,532 +463,543 @@ class DMMCrawlerV2:
             print(f"  ✗ Error extracting product {index}: {e}")
             return product
 
-    def extract_detail_info(self, product_url):
-        """Visit product detail page and extract additional information"""
-        import json
-
-        detail = {
-            'extra_info': None,
-            'total_sales': None,
-            'review_count_detail': None,
-            'favorites': None,
-            'release_date': None,
-            'contents_meta': None,
-            'format': None,
-            'pages': None,
-            'genres': None,
-            'file_size': None,
-            'title_detail': None,
-            'circle': None,
-            'circle_fans': None,
-            'campaign_discount': None,
-            'campaign_end_date': None,
-            'campaign_price': None,
-            'original_price_detail': None
-        }
+    def dismiss_popup(self, driver):
+        """Dismiss any popup by clicking top-right corner (first detail page may have commercial popup)"""
+        # No wait afterwards: fields are read from the DOM, which an overlay does not hide
+        # Skipped for restored sessions, which have already seen the popup
+        if not self.dismiss_popups:
+            return
+        try:
+            from selenium.webdriver.common.action_chains import ActionChains
+            actions = ActionChains(driver)
+            # Click at top-right corner of the page
+            actions.move_by_offset(driver.execute_script("return window.innerWidth - 50"), 50).click().perform()
+            actions.reset_actions()
+        except:
+            pass
+
+    def extract_detail_info(self, product_url, driver=None):
+        """Visit product detail page and extract additional information; None if the visit failed"""
+        driver = driver or self.driver
+        detail = build_detail({})
 
         if not product_url:
             return detail
 
         try:
-            self.driver.get(product_url)
-            time.sleep(2)
+            driver.get(product_url)
+            self.readiness.wait_for_selector(driver, 'detail', DETAIL_READY_SELECTOR)
 
-            # Dismiss any popup by clicking top-right corner (first detail page may have commercial popup)
-            try:
-                from selenium.webdriver.common.action_chains import ActionChains
-                actions = ActionChains(self.driver)
-                # Click at top-right corner of the page
-                actions.move_by_offset(self.driver.execute_script("return window.innerWidth - 50"), 50).click().perform()
-                actions.reset_actions()
-                time.sleep(0.5)
-            except:
-                pass
+            self.dismiss_popup(driver)
+            self.archive_driver_page(driver, 'product', product_url)
 
-            # Title from detail page
-            try:
-                title_elem = self.driver.find_element(By.CSS_SELECTOR, 'h1.productTitle__txt')
-                detail['title_detail'] = title_elem.text.strip()
-            except NoSuchElementException:
-                pass
+            # Read every detail field in a single round trip
+            raw = driver.execute_script(DETAIL_INFO_JS)
+            detail = build_detail(raw or {})
 
-            # Circle name
-            try:
-                circle_elem = self.driver.find_element(By.CSS_SELECTOR, 'a.circleName__txt')
-                detail['circle'] = circle_elem.text.strip()
-            except NoSuchElementException:
-                pass
-
-            # Circle fans
-            try:
-                fans_elem = self.driver.find_element(By.CSS_SELECTOR, 'div.circleFanCount__txt')
-                fans_text = fans_elem.text.strip().replace(',', '')
-                detail['circle_fans'] = int(fans_text) if fans_text.isdigit() else None
-            except (NoSuchElementException, ValueError):
-                pass
-
-            # Rankings (extra_info)
-            try:
-                rankings = {}
-                ranking_items = self.driver.find_elements(By.CSS_SELECTOR, 'li.rankingList__item')
-                for item in ranking_items:
-                    try:
-                        label = item.find_element(By.CSS_SELECTOR, 'span.rankingList__txt').text.strip()
-                        rank = item.find_element(By.CSS_SELECTOR, 'span.rankingList__txt--number').text.strip()
-                        if '24時間' in label:
-                            rankings['24h'] = rank
-                        elif '週間' in label:
-                            rankings['weekly'] = rank
-                        elif '月間' in label:
-                            rankings['monthly'] = rank
-                    except:
-                        continue
-                if rankings:
-                    parts = []
-                    if '24h' in rankings:
-                        parts.append(f"24h: {rankings['24h']}")
-                    if 'weekly' in rankings:
-                        parts.append(f"weekly: {rankings['weekly']}")
-                    if 'monthly' in rankings:
-                        parts.append(f"monthly: {rankings['monthly']}")
-                    detail['extra_info'] = ', '.join(parts)
-            except:
-                pass
+        except Exception as e:
+            print(f"    ⚠ Error extracting detail info: {e}")
+            return None
 
-            # Total sales
-            try:
-                sales_elem = self.driver.find_element(By.CSS_SELECTOR, 'span.numberOfSales__txt')
-                sales_text = sales_elem.text.strip().replace(',', '')
-                detail['total_sales'] = int(sales_text) if sales_text.isdigit() else None
-            except (NoSuchElementException, ValueError):
-                pass
+        return detail
 
-            # Review count detail
-            try:
-                review_elem = self.driver.find_element(By.CSS_SELECTOR, 'span.userReview__txt')
-                review_text = review_elem.text.strip()
-                match = re.search(r'\d+', review_text)
-                if match:
-                    detail['review_count_detail'] = int(match.group())
-            except (NoSuchElementException, ValueError):
-                pass
+    def extract_extra_info(self, product_url, driver=None):
+        """Extract extra information: commentary and reviews (for extra mode); None if the visit failed"""
+        driver = driver or self.driver
+        extra = build_extra({})
 
-            # Favorites
-            try:
-                fav_elem = self.driver.find_element(By.CSS_SELECTOR, 'span.favorites__txt')
-                fav_text = fav_elem.text.strip()
-                match = re.search(r'[\d,]+', fav_text)
-                if match:
-                    detail['favorites'] = int(match.group().replace(',', ''))
-            except (NoSuchElementException, ValueError):
-                pass
+        if not product_url:
+            return extra
 
-            # Product information from informationList
-            contents_meta = {}
-            try:
-                info_items = self.driver.find_elements(By.CSS_SELECTOR, 'div.productInformation__item dl.informationList')
-                for item in info_items:
-                    try:
-                        ttl = item.find_element(By.CSS_SELECTOR, 'dt.informationList__ttl').text.strip()
-                        txt = item.find_element(By.CSS_SELECTOR, 'dd.informationList__txt').text.strip()
-
-                        if '配信開始日' in ttl:
-                            detail['release_date'] = txt
-                        elif '作者' in ttl:
-                            contents_meta['author'] = txt
-                        elif 'シナリオ' in ttl:
-                            contents_meta['scenario'] = txt
-                        elif '作品形式' in ttl:
-                            detail['format'] = txt
-                        elif 'ページ数' in ttl:
-                            pages_match = re.search(r'\d+', txt)
-                            if pages_match:
-                                detail['pages'] = int(pages_match.group())
-                        elif '題材' in ttl:
-                            contents_meta['subject'] = txt
-                        elif 'キャンペーン' in ttl:
-                            contents_meta['campaign'] = txt
-                        elif 'ファイル容量' in ttl:
-                            detail['file_size'] = txt
-                    except:
-                        continue
-            except:
-                pass
+        try:
+            # Navigate to product page (may already be there from detail extraction)
+            current_url = driver.current_url
+            if product_url not in current_url:
+                driver.get(product_url)
+                self.readiness.wait_for_selector(driver, 'detail', DETAIL_READY_SELECTOR)
 
-            if contents_meta:
-                detail['contents_meta'] = json.dumps(contents_meta, ensure_ascii=False)
+            # Review widgets render after the main content
+            self.readiness.wait_for_selector(driver, 'extra', EXTRA_READY_SELECTOR)
+            self.archive_driver_page(driver, 'product', product_url)
 
-            # Genres
-            try:
-                genre_elems = self.driver.find_elements(By.CSS_SELECTOR, 'ul.genreTagList a.genreTag__txt')
-                genres = [elem.text.strip() for elem in genre_elems if elem.text.strip()]
-                if genres:
-                    detail['genres'] = ', '.join(genres)
-            except:
-                pass
+            # Read commentary, rating distribution and reviews in a single round trip
+            raw = driver.execute_script(EXTRA_INFO_JS) or {}
 
-            # Campaign info from l-areaPurchase
-            try:
-                campaign_elem = self.driver.find_element(By.CSS_SELECTOR, 'p.campaignBalloon__ttl')
-                detail['campaign_discount'] = campaign_elem.text.strip().split('\n')[0].strip()
-            except NoSuchElementException:
-                pass
+            self.fetch_all_reviews(raw, product_url, driver)
+            extra = build_extra(raw)
 
-            try:
-                campaign_date_elem = self.driver.find_element(By.CSS_SELECTOR, 'p.campaignBalloon__txt')
-                detail['campaign_end_date'] = campaign_date_elem.text.strip()
-            except NoSuchElementException:
-                pass
+        except Exception as e:
+            print(f"    ⚠ Error extracting extra info: {e}")
+            return None
 
-            try:
-                price_elem = self.driver.find_element(By.CSS_SELECTOR, 'p.priceList__main--emphasis')
-                price_text = price_elem.text.strip().replace(',', '').replace('円', '')
-                detail['campaign_price'] = int(price_text) if price_text.isdigit() else None
-            except (NoSuchElementException, ValueError):
-                pass
+        return extra
 
-            try:
-                orig_price_elem = self.driver.find_element(By.CSS_SELECTOR, 'span.priceList__sub--big')
-                orig_text = orig_price_elem.text.strip().replace(',', '').replace('円', '')
-                detail['original_price_detail'] = int(orig_text) if orig_text.isdigit() else None
-            except (NoSuchElementException, ValueError):
-                pass
+    def fetch_all_reviews(self, raw, product_url, driver):
+        """Replace the first rendered page of reviews with every page from the review endpoint"""
+        if self.review_fetcher:
+            self.review_fetcher.sync_cookies(driver)
+            reviews = self.review_fetcher.fetch_reviews(product_url)
+            if reviews:
+                raw['reviews'] = reviews
+
+    def extract_page_snapshot(self, product_url, driver=None):
+        """
+        Extra mode: load a product page once and parse detail and extra fields from its HTML
+        Returns (None, None) if the visit failed
+        """
+        driver = driver or self.driver
+        detail, extra = build_detail({}), build_extra({})
 
-        except Exception as e:
-            print(f"    ⚠ Error extracting detail info: {e}")
+        try:
+            driver.get(product_url)
+            self.readiness.wait_for_selector(driver, 'detail', DETAIL_READY_SELECTOR)
+            self.dismiss_popup(driver)
 
-        return detail
+            # Review widgets render after the main content
+            self.readiness.wait_for_selector(driver, 'extra', EXTRA_READY_SELECTOR)
 
-    def extract_extra_info(self, product_url):
-        """Extract extra information: commentary and reviews (for extra mode)"""
-        import json
-
-        extra = {
-            'commentary': None,
-            'avg_rating': None,
-            'total_reviews': None,
-            'reviews_with_comments': None,
-            'rating_distribution': None,
-            'reviews': None
-        }
+            # One round trip for the whole page; every field is parsed offline from the snapshot
+            html = driver.page_source
+            self.archive_html('product', product_url, html)
+            raw_detail, raw_extra = parse_product_page(html)
+            self.fetch_all_reviews(raw_extra, product_url, driver)
+            detail, extra = build_detail(raw_detail), build_extra(raw_extra)
 
-        if not product_url:
-            return extra
+        except Exception as e:
+            print(f"    ⚠ Error extracting page snapshot: {e}")
+            return None, None
+
+        return detail, extra
+
+    def extract_product_details(self, product, idx, total, driver=None):
+        """
+        Run detail (and extra) extraction for one product, updating it in place
+        Returns False if a page visit failed; the product is then not checkpointed, so --resume retries it
+        """
+        visited = True
+        done = self.resumed_by_url.get(product.get('product_url'))
+        previous = self.previous_by_url.get(product.get('product_url'))
+
+        if not product.get('product_url'):
+            print(f"    [{idx}/{total}] No URL, skipping detail extraction")
+        elif done:
+            print(f"    [{idx}/{total}] Already in checkpoint, skipping detail page")
+            self.metrics.count('detail_from_checkpoint')
+            product.update({k: done[k] for k in DETAIL_FIELDS + EXTRA_FIELDS if k in done})
+        elif previous and not changed_fields(product, previous):
+            print(f"    [{idx}/{total}] Unchanged since last snapshot, reusing detail info")
+            self.metrics.count('detail_unchanged')
+            carry_forward(product, previous, self.mode)
+        else:
+            url = product['product_url']
+            cached, static = self.detail_cache.get_detail(url) if self.detail_cache else (None, None)
+            extra_info = None
+            if self.mode == 'extra' and self.detail_cache:
+                extra_info = self.detail_cache.get_extra(url)
+            extra_fresh = False
+
+            if cached:
+                print(f"    [{idx}/{total}] Detail info from cache")
+                self.metrics.count('detail_cache_hits')
+                product.update(cached)
+            else:
+                print(f"    [{idx}/{total}] Visiting detail page...")
+                if self.mode == 'extra' and extra_info is None:
+                    # Detail and extra fields from a single page load
+                    with self.metrics.phase('detail_extra_visit', page=self.current_page, url=url):
+                        detail_info, extra_info = self.extract_page_snapshot(url, driver)
+                    extra_fresh = True
+                    if extra_info is None:
+                        extra_info = build_extra({})
+                else:
+                    with self.metrics.phase('detail_visit', page=self.current_page, url=url):
+                        detail_info = self.extract_detail_info(url, driver)
+                if detail_info is None:
+                    visited = False
+                    detail_info = build_detail({})
+                if detail_info.get('title_detail'):
+                    if self.detail_cache:
+                        self.detail_cache.put_detail(url, detail_info)
+                elif static:
+                    # Visit failed: fall back to the cached static fields
+                    detail_info.update({k: v for k, v in static.items() if v is not None})
+                product.update(detail_info)
+
+            # Extra mode: also extract commentary and reviews
+            if self.mode == 'extra':
+                if extra_info is None:
+                    print(f"      Extracting extra info (commentary, reviews)...")
+                    with self.metrics.phase('extra_visit', page=self.current_page, url=url):
+                        extra_info = self.extract_extra_info(url, driver)
+                    extra_fresh = True
+                    if extra_info is None:
+                        visited = False
+                        extra_info = build_extra({})
+                if extra_fresh and self.detail_cache and extra_info.get('commentary'):
+                    self.detail_cache.put_extra(url, extra_info)
+                product.update(extra_info)
+
+            print(f"      ✓ {(product.get('title_detail') or product.get('title') or 'Unknown')[:30]}...")
+
+        if not visited:
+            self.metrics.count('detail_failed')
+            return False
+
+        self.checkpoint.append_product(product, self.current_page)
+        return True
+
+    def extract_details_parallel(self, page_products):
+        """
+        Visit detail pages concurrently, one product per pooled WebDriver at a time
+        Returns the number of products whose visit failed
+        """
+        total = len(page_products)
+        idle_drivers = queue.Queue()
+        for driver in self.detail_drivers:
+            idle_drivers.put(driver)
+
+        def visit(item):
+            idx, product = item
+            driver = idle_drivers.get()
+            try:
+                return self.extract_product_details(product, idx, total, driver)
+            finally:
+                idle_drivers.put(driver)
 
+        # Products are updated in place, so page order (and index) is preserved
+        executor = ThreadPoolExecutor(max_workers=len(self.detail_drivers))
         try:
-            # Navigate to product page (may already be there from detail extraction)
-            current_url = self.driver.current_url
-            if product_url not in current_url:
-                self.driver.get(product_url)
-                time.sleep(2)
+            # Each visit runs in a copy of the caller's context (e.g. the service's job log binding)
+            futures = [
+                executor.submit(contextvars.copy_context().run, visit, item)
+                for item in enumerate(page_products, 1)
+            ]
+            visited = [future.result() for future in futures]
+        except KeyboardInterrupt:
+            print(f"\n\n⚠ Interrupted during detail extraction!")
+            executor.shutdown(wait=False, cancel_futures=True)
+            # Write products collected so far (unvisited ones keep their base fields)
+            self.write_page(page_products)
+            raise
+        executor.shutdown()
+        return visited.count(False)
+
+    def extract_page_products(self):
+        """Extract base info for all list items on the current page in one script call"""
+        try:
+            raw_items = self.driver.execute_script(LIST_ITEMS_JS) or []
+        except Exception as e:
+            print(f"⚠ Script extraction failed ({e}), reading list items one by one")
+            return self.extract_page_products_by_element()
 
-            # Extract commentary (작품 코멘트 / 作品コメント)
-            try:
-                commentary_elem = self.driver.find_element(
-                    By.CSS_SELECTOR, 'div.m-productSummary div.summary p.summary__txt'
-                )
-                extra['commentary'] = commentary_elem.text.strip()
-            except NoSuchElementException:
-                # Try alternative selector
-                try:
-                    commentary_elem = self.driver.find_element(
-                        By.CSS_SELECTOR, 'div.l-areaProductSummary p.summary__txt'
-                    )
-                    extra['commentary'] = commentary_elem.text.strip()
-                except NoSuchElementException:
-                    pass
+        return self.build_page_products(raw_items)
 
-            # Extract review summary info
-            try:
-                # Average rating (평균 평가 / 平均評価)
-                avg_elem = self.driver.find_element(
-                    By.CSS_SELECTOR, 'div.dcd-review__points p.dcd-review__average strong'
-                )
-                avg_text = avg_elem.text.strip()
-                try:
-                    extra['avg_rating'] = float(avg_text)
-                except ValueError:
-                    pass
-            except NoSuchElementException:
-                pass
+    def build_page_products(self, raw_items):
+        """Build product records for one page of raw list items, continuing the global index"""
+        page_products = []
+        for idx, raw in enumerate(raw_items):
+            global_index = self.product_count + idx + 1
+            product = build_product(raw, global_index, self.category_name)
+            page_products.append(product)
+            print(f"  [Base] {idx + 1}/{len(raw_items)} (#{global_index}) "
+                  f"✓ {product['title'][:30] if product['title'] else 'Unknown'}...")
 
-            try:
-                # Total reviews and comments count (총평가수 / 総評価数)
-                eval_elem = self.driver.find_element(
-                    By.CSS_SELECTOR, 'div.dcd-review__points p.dcd-review__evaluates'
-                )
-                eval_text = eval_elem.text.strip()
+        return page_products
 
-                # Extract total reviews (e.g., "21" from "총평가수 21 (5개의 코멘트)")
-                total_match = re.search(r'(\d+)', eval_text)
-                if total_match:
-                    extra['total_reviews'] = int(total_match.group(1))
+    def extract_page_products_by_element(self):
+        """Fallback: extract list items with per-element WebDriver queries"""
+        product_list = self.driver.find_elements(By.CSS_SELECTOR, LIST_ITEM_SELECTOR)
+        total_products = len(product_list)
 
-                # Extract comments count (e.g., "5" from "(5개의 코멘트)")
-                comments_match = re.search(r'\((\d+)', eval_text)
-                if comments_match:
-                    extra['reviews_with_comments'] = int(comments_match.group(1))
-            except NoSuchElementException:
-                pass
-
-            # Extract rating distribution
-            try:
-                distribution = {}
-                rating_rows = self.driver.find_elements(
-                    By.CSS_SELECTOR, 'div.dcd-review__rating_map > div'
-                )
-                for row in rating_rows:
-                    try:
-                        # Get rating level from class (e.g., dcd-review-rating-50 = 5 stars)
-                        rating_span = row.find_element(By.CSS_SELECTOR, 'span[class*="dcd-review-rating-"]')
-                        rating_class = rating_span.get_attribute('class')
-                        rating_match = re.search(r'dcd-review-rating-(\d+)', rating_class)
-                        if rating_match:
-                            rating_level = int(rating_match.group(1)) // 10  # 50 -> 5, 40 -> 4, etc.
-
-                            # Get count (e.g., "18건")
-                            count_spans = row.find_elements(By.CSS_SELECTOR, 'span')
-                            for span in count_spans:
-                                text = span.text.strip()
-                                if '건' in text or '件' in text:
-                                    count_match = re.search(r'(\d+)', text)
-                                    if count_match:
-                                        distribution[f'{rating_level}_star'] = int(count_match.group(1))
-                                        break
-                    except:
-                        continue
-
-                if distribution:
-                    extra['rating_distribution'] = json.dumps(distribution, ensure_ascii=False)
-            except:
-                pass
+        page_products = []
+        for idx in range(total_products):
+            global_index = self.product_count + idx + 1
+            print(f"  [Base] Processing product {idx + 1}/{total_products} (#{global_index})...")
 
-            # Extract individual reviews
             try:
-                reviews_list = []
-                review_items = self.driver.find_elements(
-                    By.CSS_SELECTOR, 'div.dcd-review__list ul li.dcd-review__unit'
-                )
+                li_element = product_list[idx]
+                product = self.extract_product(li_element, global_index)
+                page_products.append(product)
+                print(f"    ✓ {product['title'][:30] if product['title'] else 'Unknown'}...")
+            except Exception as e:
+                print(f"    ✗ Error extracting product {idx + 1}: {e}")
+                page_products.append({
+                    'index': global_index,
+                    'category': self.category_name or 'default'
+                })
+
+        return page_products
+
+    def wait_page_interval(self):
+        """Keep list page requests at least WAIT_TIME apart, counting time already spent crawling"""
+        waited = self.throttle.wait()
+        if waited:
+            print(f"Waited {waited:.1f}s for the request interval")
+        self.readiness.record('page_interval', waited)
+        self.metrics.record('throttle_wait', waited)
+
+    def page_url(self, page_num):
+        """Construct list URL with page number"""
+        if page_num == 1:
+            return self.base_url
+        if '?' in self.base_url:
+            return f"{self.base_url}&page={page_num}"
+        return f"{self.base_url}?page={page_num}"
+
+    def crawl_page_http(self, page_num, url):
+        """Crawl a list page over HTTP; returns None if the page needs a browser"""
+        with self.metrics.phase('list_fetch_http', page=page_num):
+            html = self.http_fetcher.fetch(url)
+        if not html:
+            return None
 
-                for item in review_items:
-                    review = {}
+        raw_items = parse_list_html(html, url)
+        if not raw_items:
+            return None
+        self.archive_html('list', url, html, page=page_num)
 
-                    # Rating
-                    try:
-                        rating_span = item.find_element(By.CSS_SELECTOR, 'span[class*="dcd-review-rating-"]')
-                        rating_class = rating_span.get_attribute('class')
-                        rating_match = re.search(r'dcd-review-rating-(\d+)', rating_class)
-                        if rating_match:
-                            review['rating'] = int(rating_match.group(1)) // 10
-                    except:
-                        pass
+        print(f"Found {len(raw_items)} products on page {page_num} (HTTP)")
+        return self.finish_page(self.build_page_products(raw_items), page_num)
 
-                    # Title
-                    try:
-                        title_elem = item.find_element(By.CSS_SELECTOR, 'span.dcd-review__unit__title')
-                        review['title'] = title_elem.text.strip()
-                    except:
-                        pass
+    def finish_page(self, page_products, page_num):
+        """Run the detail phase for one page of products and write them to the CSV"""
+        self.current_page = page_num
 
-                    # Comment text
-                    try:
-                        comment_elem = item.find_element(By.CSS_SELECTOR, 'div.dcd-review__unit__comment')
-                        review['comment'] = comment_elem.text.strip()
-                    except:
-                        pass
-
-                    # Reviewer name
-                    try:
-                        reviewer_elem = item.find_element(By.CSS_SELECTOR, 'span.dcd-review__unit__reviewer a')
-                        review['reviewer'] = reviewer_elem.text.strip()
-                    except:
-                        pass
+        # PHASE 2: If detail or extra mode, visit each product URL separately
+        # (each product is checkpointed as soon as its detail visit succeeds)
+        failed = 0
+        if self.mode in ['detail', 'extra']:
+            print(f"\n  [Detail] Extracting detail info for {len(page_products)} products...")
+            with self.metrics.phase('setup_detail_pool'):
+                self.setup_detail_pool()
 
-                    # Date
+            if len(self.detail_drivers) > 1:
+                with self.metrics.phase('page_details', page=page_num):
+                    failed = self.extract_details_parallel(page_products)
+            else:
+                for idx, product in enumerate(page_products, 1):
                     try:
-                        date_elem = item.find_element(By.CSS_SELECTOR, 'span.dcd-review__unit__postdate')
-                        date_text = date_elem.text.strip()
-                        # Extract date (e.g., "2025-11-25" from "-2025-11-25 -")
-                        date_match = re.search(r'(\d{4}-\d{2}-\d{2})', date_text)
-                        if date_match:
-                            review['date'] = date_match.group(1)
-                    except:
-                        pass
+                        if not self.extract_product_details(product, idx, len(page_products)):
+                            failed += 1
+                    except KeyboardInterrupt:
+                        print(f"\n\n⚠ Interrupted during detail extraction!")
+                        # Write products collected so far (including current partial one)
+                        self.write_page(page_products[:idx])
+                        raise  # Re-raise to be caught by run()
 
-                    # Helpful votes
+        else:
+            for product in page_products:
+                self.checkpoint.append_product(product, page_num)
+
+        # Stream the finished page to the CSV; nothing is kept in memory past this point
+        with self.metrics.phase('write_page', page=page_num):
+            self.write_page(page_products)
+        self.metrics.count('pages')
+        self.metrics.count('products', len(page_products))
+        if failed:
+            # Not marked done: --resume reloads the page and revisits only the failed products
+            print(f"⚠ {failed} detail visit(s) failed on page {page_num}, left for --resume")
+            self.incomplete_pages.add(page_num)
+        else:
+            self.checkpoint.mark_page_done(page_num, len(page_products))
+
+        return len(page_products)
+
+    def crawl_pages_in_tabs(self, page_nums):
+        """
+        Load several list pages at once in separate tabs
+        Returns product counts in page order, ending at the first empty (0) or failed (None) page
+        """
+        main_window = self.driver.current_window_handle
+        tabs = []
+
+        # Open every page without waiting for it to load (window.open does not block)
+        for page_num in page_nums:
+            url = self.page_url(page_num)
+            print(f"\n📄 Opening page {page_num} in a new tab: {url}")
+            self.wait_page_interval()
+            before = set(self.driver.window_handles)
+            self.driver.execute_script("window.open(arguments[0], '_blank');", url)
+            new_handles = set(self.driver.window_handles) - before
+            tabs.append((page_num, new_handles.pop() if new_handles else None))
+
+        # Extract each tab once it is ready; loads of later tabs overlap with this work
+        raw_pages = []
+        for page_num, handle in tabs:
+            raw_items = []
+            if handle:
+                try:
+                    self.driver.switch_to.window(handle)
+                    if self.readiness.wait_for_selector(self.driver, 'list', LIST_READY_SELECTOR):
+                        self.readiness.wait_for_stable_count(self.driver, 'list_stable', LIST_ITEM_SELECTOR)
+                        self.archive_driver_page(self.driver, 'list', self.page_url(page_num), page=page_num)
+                        with self.metrics.phase('list_extract', page=page_num):
+                            raw_items = self.driver.execute_script(LIST_ITEMS_JS) or []
+                    else:
+                        print(f"⚠ Product list not found on page {page_num}")
+                except Exception as e:
+                    print(f"✗ Error reading page {page_num}: {e}")
+                    raw_items = None
+                finally:
                     try:
-                        voted_elem = item.find_element(By.CSS_SELECTOR, 'p.dcd-review__unit__voted strong')
-                        voted_text = voted_elem.text.strip()
-                        voted_match = re.search(r'(\d+)', voted_text)
-                        if voted_match:
-                            review['helpful_votes'] = int(voted_match.group(1))
-                    except:
+                        self.driver.close()
+                    except Exception:
                         pass
+            else:
+                raw_items = None
+            raw_pages.append((page_num, raw_items))
 
-                    if review:
-                        reviews_list.append(review)
-
-                if reviews_list:
-                    extra['reviews'] = json.dumps(reviews_list, ensure_ascii=False)
+        self.driver.switch_to.window(main_window)
 
-            except Exception as e:
-                print(f"      ⚠ Error extracting reviews: {e}")
+        # Build products in page order so global indexes match a sequential crawl
+        counts = []
+        for page_num, raw_items in raw_pages:
+            if raw_items is None:
+                counts.append(None)
+                break
+            if not raw_items:
+                print(f"✗ No products found on page {page_num}")
+                counts.append(0)
+                break
 
-        except Exception as e:
-            print(f"    ⚠ Error extracting extra info: {e}")
+            print(f"\nFound {len(raw_items)} products on page {page_num}")
+            counts.append(self.finish_page(self.build_page_products(raw_items), page_num))
 
-        return extra
+        return counts
 
     def crawl_page(self, page_num=1):
-        """Crawl a single page of products"""
+        """Crawl a single page of products; returns the product count (0 past the last page), None on failure"""
         try:
-            # Construct URL with page number
-            if page_num == 1:
-                url = self.base_url
-            else:
-                if '?' in self.base_url:
-                    url = f"{self.base_url}&page={page_num}"
-                else:
-                    url = f"{self.base_url}?page={page_num}"
-
+            url = self.page_url(page_num)
             print(f"\n📄 Crawling page {page_num}: {url}")
-            self.driver.get(url)
 
-            # Click age verification on first page
-            if page_num == 1:
-                self.click_age_verification()
-
-            # Wait for product list
-            wait = WebDriverWait(self.driver, 15)
-            try:
-                wait.until(EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, 'ul.productList, ul.fn-productList')
-                ))
-            except TimeoutException:
+            self.wait_page_interval()
+            if self.http_fetcher:
+                products_found = self.crawl_page_http(page_num, url)
+                if products_found is not None:
+                    return products_found
+
+                # JS-gated or blocked: stay on Selenium for the rest of the run
+                print("⚠ List page needs a browser, falling back to Selenium")
+                self.close_http_fetcher()
+                if not self.driver:
+                    self.setup_driver()
+
+            with self.metrics.phase('list_load', page=page_num):
+                self.driver.get(url)
+
+            # Click age verification on first browser page
+            if not self.age_verified:
+                with self.metrics.phase('age_verification'):
+                    self.click_age_verification()
+            elif self.session_restored and not self.session_checked:
+                self.check_restored_session()
+
+            # Wait for product list, then for its items to finish rendering
+            if not self.readiness.wait_for_selector(self.driver, 'list', LIST_READY_SELECTOR):
                 print("⚠ Product list not found")
+            else:
+                self.readiness.wait_for_stable_count(self.driver, 'list_stable', LIST_ITEM_SELECTOR)
+                self.archive_driver_page(self.driver, 'list', url, page=page_num)
 
-            time.sleep(2)
-
-            # Find all products
-            product_list = self.driver.find_elements(By.CSS_SELECTOR, 'li.productList__item')
+            # PHASE 1: Extract all base product info first (avoids stale element issues)
+            with self.metrics.phase('list_extract', page=page_num):
+                page_products = self.extract_page_products()
 
-            if not product_list:
+            if not page_products:
                 print("✗ No products found on this page")
                 return 0
 
-            total_products = len(product_list)
-            print(f"Found {total_products} products on page {page_num}")
-
-            # Store current URL for returning after detail extraction
-            list_page_url = self.driver.current_url
-
-            # PHASE 1: Extract all base product info first (avoids stale element issues)
-            page_products = []
-            for idx in range(total_products):
-                global_index = len(self.products) + idx + 1
-                print(f"  [Base] Processing product {idx + 1}/{total_products} (#{global_index})...")
-
-                try:
-                    li_element = product_list[idx]
-                    product = self.extract_product(li_element, global_index)
-                    page_products.append(product)
-                    print(f"    ✓ {product['title'][:30] if product['title'] else 'Unknown'}...")
-                except Exception as e:
-                    print(f"    ✗ Error extracting product {idx + 1}: {e}")
-                    page_products.append({
-                        'index': global_index,
-                        'category': self.category_name or 'default'
-                    })
-
-            # PHASE 2: If detail or extra mode, visit each product URL separately
-            if self.mode in ['detail', 'extra']:
-                print(f"\n  [Detail] Extracting detail info for {len(page_products)} products...")
-
-                for idx, product in enumerate(page_products, 1):
-                    try:
-                        if product.get('product_url'):
-                            print(f"    [{idx}/{len(page_products)}] Visiting detail page...")
-                            detail_info = self.extract_detail_info(product['product_url'])
-                            product.update(detail_info)
-
-                            # Extra mode: also extract commentary and reviews
-                            if self.mode == 'extra':
-                                print(f"      Extracting extra info (commentary, reviews)...")
-                                extra_info = self.extract_extra_info(product['product_url'])
-                                product.update(extra_info)
-
-                            print(f"      ✓ {product.get('title_detail', product.get('title', 'Unknown'))[:30]}...")
-                        else:
-                            print(f"    [{idx}/{len(page_products)}] No URL, skipping detail extraction")
-                    except KeyboardInterrupt:
-                        print(f"\n\n⚠ Interrupted during detail extraction!")
-                        # Add products collected so far (including current partial one)
-                        self.products.extend(page_products[:idx])
-                        raise  # Re-raise to be caught by run()
-
-            # Add all products to main list
-            self.products.extend(page_products)
-
-            return total_products
+            print(f"Found {len(page_products)} products on page {page_num}")
+            return self.finish_page(page_products, page_num)
 
         except TimeoutException:
             print(f"✗ Timeout loading page {page_num}")
-            return 0
+            return None
         except Exception as e:
             print(f"✗ Error crawling page {page_num}: {e}")
             import traceback
             traceback.print_exc()
-            return 0
-
-    def save_to_csv(self, filename=None):
-        """Save products to CSV"""
-        if not self.products:
-            print("✗ No products to save")
             return None
 
-        if filename is None:
-            timestamp = datetime.now().strftime('%Y-%m-%d')
-            category = self.category_name or 'default'
-            filename = f"{category}_{timestamp}.csv"
+    def csv_fieldnames(self):
+        """CSV columns for the crawl mode"""
+        # Base mode fields, detail mode adds more fields, extra mode adds commentary and reviews
+        return fields_for_mode(self.mode)
 
-        output_path = self.output_dir / filename
+    def open_csv_stream(self):
+        """Create the output CSV and write its header"""
+        self.csv_stream = CsvStreamWriter(self.output_dir / f"{self.output_basename()}.csv", self.csv_fieldnames())
+        self.csv_stream.open()
+        print(f"✓ Writing products to: {self.csv_stream.path}")
 
-        # Base mode fields
-        fieldnames = [
-            'index', 'category', 'image_url', 'product_url', 'title', 'writer', 'genre',
-            'is_exclusive', 'discount', 'sale_price', 'original_price',
-            'copies_sold', 'rating', 'review_count'
-        ]
+        if self.parquet:
+            self.parquet_stream = ParquetStreamWriter(
+                self.output_dir / f"{self.output_basename()}.parquet", self.csv_fieldnames()
+            )
+            self.parquet_stream.open()
+            print(f"✓ Writing typed columns to: {self.parquet_stream.path}")
 
-        # Detail mode adds more fields
-        if self.mode in ['detail', 'extra']:
-            fieldnames.extend([
-                'extra_info', 'total_sales', 'review_count_detail', 'favorites',
-                'release_date', 'contents_meta', 'format', 'pages', 'genres', 'file_size',
-                'title_detail', 'circle', 'circle_fans',
-                'campaign_discount', 'campaign_end_date', 'campaign_price', 'original_price_detail'
-            ])
-
-        # Extra mode adds commentary and reviews
-        if self.mode == 'extra':
-            fieldnames.extend([
-                'commentary', 'avg_rating', 'total_reviews', 'reviews_with_comments',
-                'rating_distribution', 'reviews'
-            ])
-
-        with open(output_path, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-            writer.writeheader()
-            writer.writerows(self.products)
+        if self.snapshot_db:
+            try:
+                self.snapshot_store = SnapshotStore(self.snapshot_db)
+                self.snapshot_run = self.snapshot_store.start_run(
+                    self.category_name or 'default', self.mode, self.base_url
+                )
+            except Exception as e:
+                print(f"⚠ Snapshot history disabled: {e}")
+                self.snapshot_store = None
+
+    def write_page(self, page_products):
+        """Append one page of products to the output CSV (and Parquet file)"""
+        if self.csv_stream and page_products:
+            self.csv_stream.write_rows(page_products)
+            if self.parquet_stream:
+                self.parquet_stream.write_rows(page_products)
+            if self.snapshot_store:
+                try:
+                    self.snapshot_store.add_products(*self.snapshot_run, page_products)
+                except Exception as e:
+                    print(f"⚠ Could not record snapshot history: {e}")
+            self.product_count += len(page_products)
+
+    def close_csv_stream(self):
+        """Close the output CSV (and Parquet file)"""
+        if self.parquet_stream:
+            self.parquet_stream.close()
+            self.parquet_stream = None
+        if self.snapshot_store:
+            self.snapshot_store.close()
+            self.snapshot_store = None
+
+        if not self.csv_stream:
+            return None
+
+        self.csv_stream.close()
+        path, self.csv_stream = self.csv_stream.path, None
+        if not self.product_count:
+            print("✗ No products to save")
+            return None
 
         print(f"\n{'='*60}")
-        print(f"✓ Saved {len(self.products)} products to: {output_path}")
+        print(f"✓ Saved {self.product_count} products to: {path}")
         print(f"{'='*60}")
 
-        return output_path
+        return path
+
+    def write_metrics(self):
+        """Write the phase timing summary next to the CSV ({category}_{date}.metrics.json)"""
+        try:
+            self.metrics_summary = self.metrics.write_summary(
+                self.output_dir / f"{self.output_basename()}.metrics.json", self.readiness
+            )
+        except Exception as e:
+            print(f"⚠ Could not write metrics: {e}")
 
     def run(self, max_pages=1):
         """Run the crawler"""
+        completed = False
+        failed_page = None
         try:
             print(f"{'='*60}")
             print(f"DMM Crawler V2 - {self.mode.upper()} Mode")
@@ -776,29 +1010,75 @@ class DMMCrawlerV2:
             print(f"Output: {self.output_dir}")
             print(f"{'='*60}\n")
 
-            self.setup_driver()
+            # Open the metrics stream first so driver startup is recorded
+            self.metrics.open(self.output_dir / f"{self.output_basename()}.metrics.jsonl")
 
-            for page_num in range(1, max_pages + 1):
-                products_found = self.crawl_page(page_num)
+            if self.engine == 'http':
+                if self.shared_http_fetcher:
+                    self.http_fetcher = self.shared_http_fetcher
+                else:
+                    from http_fetcher import HttpListFetcher
+                    self.http_fetcher = HttpListFetcher(self.session_store)
+                    print("✓ HTTP session initialized")
+            elif not self.driver:
+                self.setup_driver()
+
+            self.open_checkpoint()
+            self.open_html_archive()
+            # Read the previous snapshot before today's CSV is recreated
+            if self.changed_only:
+                self.load_previous_snapshot()
+            self.open_csv_stream()
+
+            page_num = 1
+            while page_num <= max_pages:
+                if page_num in self.resumed_pages:
+                    print(f"\n📄 Page {page_num} already in checkpoint "
+                          f"({len(self.resumed_pages[page_num])} products), skipping")
+                    self.write_page(self.resumed_pages[page_num])
+                    page_num += 1
+                    continue
+
+                # Tabs need an age-verified browser session; a restored or passed-in session is
+                # checked on the first normally loaded page before tabs are used
+                session_ok = self.age_verified and (self.session_checked or not self.session_restored)
+                if self.list_tabs > 1 and self.driver and session_ok:
+                    page_nums = []
+                    while (len(page_nums) < self.list_tabs and page_num + len(page_nums) <= max_pages
+                           and page_num + len(page_nums) not in self.resumed_pages):
+                        page_nums.append(page_num + len(page_nums))
+                    counts = self.crawl_pages_in_tabs(page_nums)
+                else:
+                    page_nums = [page_num]
+                    counts = [self.crawl_page(page_num)]
 
-                if products_found == 0:
-                    print(f"\nNo more products. Stopping at page {page_num}")
+                if None in counts:
+                    failed_page = page_nums[counts.index(None)]
+                    print(f"\n✗ Page {failed_page} failed, stopping")
+                    break
+                if 0 in counts:
+                    print(f"\nNo more products. Stopping at page {page_nums[counts.index(0)]}")
                     break
 
-                if page_num < max_pages:
-                    print(f"\nWaiting {WAIT_TIME}s before next page...")
-                    time.sleep(WAIT_TIME)
+                page_num += len(page_nums)
 
-            self.save_to_csv()
-            print("\n✓ Crawling completed!")
+            self.close_csv_stream()
+            self.readiness.print_summary()
+            self.metrics.print_summary()
+            if failed_page or self.incomplete_pages:
+                # Keep the checkpoint so --resume picks up the failed pages and products
+                print(f"\n⚠ Crawling incomplete, checkpoint kept for --resume: {self.checkpoint.path}")
+            else:
+                print("\n✓ Crawling completed!")
+                completed = True
 
         except KeyboardInterrupt:
             print("\n\n" + "="*60)
             print("⚠ INTERRUPTED BY USER (Ctrl+C)")
             print("="*60)
-            if self.products:
-                print(f"Saving {len(self.products)} products collected so far...")
-                self.save_to_csv()
+            if self.product_count:
+                print(f"Keeping {self.product_count} products collected so far...")
+                self.close_csv_stream()
                 print("✓ Partial results saved successfully!")
             else:
                 print("No products collected yet.")
@@ -807,58 +1087,126 @@ class DMMCrawlerV2:
             print(f"\n✗ Crawling failed: {e}")
             import traceback
             traceback.print_exc()
-            if self.products:
+            if self.product_count:
                 print("Saving partial results...")
-                self.save_to_csv()
 
         finally:
-            if self.driver:
-                self.driver.quit()
-                print("\n✓ WebDriver closed")
+            self.close_csv_stream()
+            self.write_metrics()
+            if completed:
+                self.checkpoint.remove()
+            else:
+                self.checkpoint.close()
+            if self.detail_cache:
+                self.detail_cache.close()
+            if self.review_fetcher:
+                self.review_fetcher.close()
+            if self.html_archive:
+                self.html_archive.close()
+            self.save_session()
+            self.close_http_fetcher()
+            self.close_drivers()
+
+
+def crawl_category(category_name, url, max_pages=1, output_dir=DEFAULT_OUTPUT_DIR, mode='base', **crawler_kwargs):
+    """Crawl one category and return its summary result"""
+    try:
+        crawler = DMMCrawlerV2(
+            base_url=url,
+            output_dir=output_dir,
+            category_name=category_name,
+            mode=mode,
+            **crawler_kwargs
+        )
+        crawler.run(max_pages=max_pages)
+
+        return {
+            'products': crawler.product_count,
+            'status': 'success',
+            'metrics': crawler.metrics_summary
+        }
+
+    except Exception as e:
+        print(f"\n✗ Failed to crawl {category_name}: {e}")
+        return {
+            'products': 0,
+            'status': 'failed',
+            'error': str(e)
+        }
+
+
+# Request throttle shared by every category worker process (set by _init_category_worker)
+_worker_throttle = None
+
 
+def _init_category_worker(lock, last_request, min_interval):
+    """Process pool initializer: attach the shared politeness limit"""
+    global _worker_throttle
+    _worker_throttle = RequestThrottle(min_interval, lock, last_request)
+
+
+def _crawl_category_worker(category_name, url, max_pages, output_dir, mode, crawler_kwargs):
+    """Process pool entry point for one category"""
+    return crawl_category(category_name, url, max_pages, output_dir, mode,
+                          throttle=_worker_throttle, **crawler_kwargs)
+
+
+def crawl_multiple_urls(url_dict, max_pages=1, output_dir=DEFAULT_OUTPUT_DIR, mode='base',
+                        workers=CATEGORY_WORKERS, **crawler_kwargs):
+    """Crawl multiple URLs with category names (extra kwargs are passed to DMMCrawlerV2)"""
+    workers = max(1, min(workers, len(url_dict)))
 
-def crawl_multiple_urls(url_dict, max_pages=1, output_dir=DEFAULT_OUTPUT_DIR, mode='base'):
-    """Crawl multiple URLs with category names"""
     print(f"{'='*60}")
     print(f"DMM Crawler V2 - Multi-URL Mode")
     print(f"{'='*60}")
     print(f"Mode: {mode}")
     print(f"Categories: {len(url_dict)}")
     print(f"Pages per category: {max_pages}")
+    print(f"Workers: {workers}")
     print(f"{'='*60}\n")
 
     results = {}
 
-    for idx, (category_name, url) in enumerate(url_dict.items(), 1):
-        print(f"\n{'#'*60}")
-        print(f"Category {idx}/{len(url_dict)}: {category_name}")
-        print(f"{'#'*60}\n")
+    if workers > 1:
+        # One process (and one driver) per category, with list requests throttled across all of them
+        shared = RequestThrottle.shared(WAIT_TIME)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_category_worker,
+            initargs=(shared.lock, shared.last_request, WAIT_TIME)
+        ) as executor:
+            futures = {
+                category_name: executor.submit(
+                    _crawl_category_worker, category_name, url, max_pages, output_dir, mode, crawler_kwargs
+                )
+                for category_name, url in url_dict.items()
+            }
 
-        try:
-            crawler = DMMCrawlerV2(
-                base_url=url,
-                output_dir=output_dir,
-                category_name=category_name,
-                mode=mode
-            )
-            crawler.run(max_pages=max_pages)
+            # Same order as url_dict, regardless of completion order
+            for category_name, future in futures.items():
+                try:
+                    results[category_name] = future.result()
+                except Exception as e:
+                    print(f"\n✗ Failed to crawl {category_name}: {e}")
+                    results[category_name] = {
+                        'products': 0,
+                        'status': 'failed',
+                        'error': str(e)
+                    }
 
-            results[category_name] = {
-                'products': len(crawler.products),
-                'status': 'success'
-            }
+    else:
+        for idx, (category_name, url) in enumerate(url_dict.items(), 1):
+            print(f"\n{'#'*60}")
+            print(f"Category {idx}/{len(url_dict)}: {category_name}")
+            print(f"{'#'*60}\n")
 
-        except Exception as e:
-            print(f"\n✗ Failed to crawl {category_name}: {e}")
-            results[category_name] = {
-                'products': 0,
-                'status': 'failed',
-                'error': str(e)
-            }
+            results[category_name] = crawl_category(
+                category_name, url, max_pages, output_dir, mode, **crawler_kwargs
+            )
 
-        if idx < len(url_dict):
-            print(f"\nWaiting {WAIT_TIME}s before next category...")
-            time.sleep(WAIT_TIME)
+            if idx < len(url_dict):
+                print(f"\nWaiting {WAIT_TIME}s before next category...")
+                time.sleep(WAIT_TIME)
 
     # Summary
     print(f"\n\n{'='*60}")
@@ -888,19 +1236,60 @@ def main():
     parser.add_argument('--url', help='Single URL to crawl')
     parser.add_argument('--urls-file', help='JSON file with {category: url} mapping')
     parser.add_argument('--category', help='Category name for single URL')
+    parser.add_argument('--engine', choices=['selenium', 'http'], default=CRAWL_ENGINE,
+                        help='List page engine (http skips the browser in base mode)')
+    parser.add_argument('--lean', action='store_true', default=LEAN_PROFILE,
+                        help='Block images, fonts, media and trackers in Chrome')
+    parser.add_argument('--list-tabs', type=int, default=LIST_TABS,
+                        help='List pages loaded at once in separate browser tabs')
+    parser.add_argument('--session-file', default=SESSION_FILE,
+                        help='JSON file to save/restore the age-verified browser session')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue from the checkpoint of an interrupted crawl')
+    parser.add_argument('--detail-cache', default=DETAIL_CACHE_FILE,
+                        help='SQLite file caching detail page results between runs')
+    parser.add_argument('--changed-only', action='store_true',
+                        help='Only visit detail pages of new products or products changed since the last CSV')
+    parser.add_argument('--parquet', action='store_true', default=PARQUET_OUTPUT,
+                        help='Also write a typed Parquet file next to the CSV (requires pyarrow)')
+    parser.add_argument('--snapshot-db', default=SNAPSHOT_DB,
+                        help='SQLite history database to record the run in (default: off)')
+    parser.add_argument('--review-api', default=REVIEW_API_URL,
+                        help='Review endpoint URL template with {cid} and {page} (extra mode)')
+    parser.add_argument('--html-archive', default=HTML_ARCHIVE_DIR,
+                        help='Directory to archive raw page HTML in for reparse.py (requires zstandard)')
+    parser.add_argument('--workers', type=int, default=CATEGORY_WORKERS,
+                        help='Categories crawled in parallel with --urls-file (one process each)')
 
     args = parser.parse_args()
 
     if args.urls_file:
         with open(args.urls_file, 'r', encoding='utf-8') as f:
             url_dict = json.load(f)
-        crawl_multiple_urls(url_dict, max_pages=args.pages, output_dir=args.output)
+        crawl_multiple_urls(url_dict, max_pages=args.pages, output_dir=args.output,
+                            workers=args.workers, engine=args.engine, lean=args.lean,
+                            list_tabs=args.list_tabs, session_file=args.session_file,
+                            resume=args.resume, detail_cache=args.detail_cache,
+                            changed_only=args.changed_only, parquet=args.parquet,
+                            snapshot_db=args.snapshot_db, review_api=args.review_api,
+                            html_archive=args.html_archive)
 
     elif args.url:
         crawler = DMMCrawlerV2(
             base_url=args.url,
             output_dir=args.output,
-            category_name=args.category
+            category_name=args.category,
+            engine=args.engine,
+            lean=args.lean,
+            list_tabs=args.list_tabs,
+            session_file=args.session_file,
+            resume=args.resume,
+            detail_cache=args.detail_cache,
+            changed_only=args.changed_only,
+            parquet=args.parquet,
+            snapshot_db=args.snapshot_db,
+            review_api=args.review_api,
+            html_archive=args.html_archive
         )
         crawler.run(max_pages=args.pages)
 
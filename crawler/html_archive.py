@@ -0,0 +1,119 @@
+"""
+DMM HTML Archive
+Stores the raw HTML of crawled list and product pages, zstd-compressed and content-addressed
+(identical pages are stored once), with one manifest per run for offline re-parsing (reparse.py)
+
+Layout:
+    {root}/objects/ab/abcdef....html.zst    page HTML, named by its SHA-256
+    {root}/runs/{category}_{timestamp}.jsonl  run header, then one record per archived page
+"""
+
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from datetime import datetime
+
+
+class HtmlArchive:
+    """Content-addressed page store plus the manifest of the current run"""
+
+    def __init__(self, root):
+        import zstandard  # Optional dependency, only needed when archiving is enabled
+
+        self.zstandard = zstandard
+        self.root = Path(root)
+        self.manifest = None
+        self.manifest_path = None
+        self.stored = 0
+        self.deduplicated = 0
+        self._lock = threading.Lock()
+
+    def object_path(self, digest):
+        return self.root / 'objects' / digest[:2] / f"{digest}.html.zst"
+
+    def open_run(self, category, mode, base_url):
+        """Start the manifest for a crawl run"""
+        started_at = datetime.now()
+        self.manifest_path = self.root / 'runs' / f"{category}_{started_at.strftime('%Y-%m-%dT%H%M%S')}.jsonl"
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        self.manifest = open(self.manifest_path, 'w', encoding='utf-8')
+        self._write_record({
+            'type': 'run',
+            'category': category,
+            'mode': mode,
+            'base_url': base_url,
+            'started_at': started_at.isoformat(timespec='seconds')
+        })
+
+    def _write_record(self, record):
+        self.manifest.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.manifest.flush()
+
+    def store(self, kind, url, html, **meta):
+        """
+        Archive one page ('list' or 'product') and record it in the run manifest
+        Extra keyword fields (e.g. page=3) are kept in the manifest record
+        """
+        data = html.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+
+        is_new = not path.exists()
+        if is_new:
+            # Compressors are not thread-safe, so each store uses its own
+            # Write then rename so readers never see a partial object
+            compressed = self.zstandard.ZstdCompressor(level=10).compress(data)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            if is_new:
+                self.stored += 1
+            else:
+                self.deduplicated += 1
+            self._write_record({
+                'type': 'page',
+                'kind': kind,
+                'url': url,
+                'sha256': digest,
+                'fetched_at': datetime.now().isoformat(timespec='seconds'),
+                **meta
+            })
+
+    def close(self):
+        """Close the run manifest"""
+        if self.manifest:
+            self.manifest.close()
+            self.manifest = None
+            print(f"✓ HTML archive: {self.stored} new page(s), {self.deduplicated} unchanged "
+                  f"({self.manifest_path.name})")
+
+
+def read_manifest(manifest_path):
+    """(run header, page records) of a run manifest; a truncated last line is ignored"""
+    header, pages = {}, []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('type') == 'run':
+                header = record
+            elif record.get('type') == 'page':
+                pages.append(record)
+    return header, pages
+
+
+def read_object(root, digest):
+    """Decompressed HTML of an archived page"""
+    import zstandard
+
+    path = Path(root) / 'objects' / digest[:2] / f"{digest}.html.zst"
+    with open(path, 'rb') as f:
+        return zstandard.ZstdDecompressor().decompress(f.read()).decode('utf-8')
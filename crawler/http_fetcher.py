@@ -0,0 +1,56 @@
+"""
+DMM HTTP List Fetcher
+Fetches list pages over a pooled HTTP session (no browser) for base mode
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import USER_AGENT, PAGE_LOAD_TIMEOUT, AGE_CHECK_COOKIES, HTTP_POOL_SIZE
+
+
+class HttpListFetcher:
+    """Keep-alive HTTP session with the age verification cookie already set"""
+
+    def __init__(self, session_store=None):
+        self.session = requests.Session()
+
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=2)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Language': 'ja,en-US;q=0.8,en;q=0.6'
+        })
+
+        for cookie in AGE_CHECK_COOKIES:
+            self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path='/')
+
+        # Reuse cookies from a saved browser session when available
+        if session_store:
+            session_store.apply_to_http(self.session)
+
+    def fetch(self, url):
+        """Return page HTML, or None if the request failed or was sent to the age check"""
+        try:
+            response = self.session.get(url, timeout=PAGE_LOAD_TIMEOUT)
+        except requests.RequestException as e:
+            print(f"⚠ HTTP fetch failed: {e}")
+            return None
+
+        if response.status_code != 200:
+            print(f"⚠ HTTP fetch returned {response.status_code}")
+            return None
+
+        if 'age_check' in response.url:
+            print("⚠ HTTP fetch redirected to age check")
+            return None
+
+        if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+            response.encoding = 'utf-8'
+        return response.text
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
@@ -0,0 +1,263 @@
+"""
+DMM Image Transfer
+One engine per upload run: keep-alive image downloads, a single bounded S3 upload executor,
+and a shared Miro HTTP session, used by both board uploaders
+
+Images are stored under content-addressed keys (hash of the source URL), so a cover is uploaded
+once across runs and boards; a local manifest of existing keys (with a HEAD fallback) skips
+re-uploads and only the presigned URL is regenerated
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from miro_client import MiroClient
+from config import (
+    IMAGE_DOWNLOAD_CONCURRENCY, IMAGE_DOWNLOAD_PER_HOST, IMAGE_S3_WORKERS, MIRO_CONNECTIONS,
+    IMAGE_S3_PREFIX, IMAGE_MANIFEST_FILE, IMAGE_PIPELINE_QUEUE
+)
+
+
+PRESIGNED_URL_EXPIRES = 604800  # 7 days
+
+
+def create_s3_client(max_connections=IMAGE_S3_WORKERS):
+    """S3 client from the environment, with a connection pool sized for the upload executor"""
+    return boto3.client(
+        "s3",
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+        region_name=os.getenv('S3_REGION', 'ap-northeast-2'),
+        config=Config(max_pool_connections=max_connections)
+    )
+
+
+class ImageTransfer:
+    """
+    Shared clients for an upload run:
+        async with ImageTransfer() as transfer:
+            url = await transfer.upload(image_url)
+            await transfer.miro.request('POST', ...)
+    """
+
+    def __init__(self, s3_bucket=None, download_limit=IMAGE_DOWNLOAD_CONCURRENCY,
+                 per_host_limit=IMAGE_DOWNLOAD_PER_HOST, s3_workers=IMAGE_S3_WORKERS,
+                 s3_prefix=IMAGE_S3_PREFIX, manifest_path=IMAGE_MANIFEST_FILE):
+        self.s3_bucket = s3_bucket or os.getenv('S3_BUCKET_NAME')
+        self.s3_prefix = s3_prefix
+        self.download_limit = download_limit
+        self.per_host_limit = per_host_limit
+        self.s3 = create_s3_client(s3_workers)
+        self.executor = ThreadPoolExecutor(max_workers=s3_workers, thread_name_prefix='s3-upload')
+        self.image_session = None
+        self.miro_session = None
+        self.miro = None  # MiroClient shared by every board of the run
+
+        # Keys known to exist in the bucket, and uploads in flight (one per key)
+        self.manifest_path = Path(manifest_path) if manifest_path else None
+        self.known_keys = self.load_manifest()
+        self.pending = {}
+        self.urls = {}  # s3 key -> presigned URL handed out in this run (shared by both boards)
+        self.stats = {'uploaded': 0, 'reused': 0, 'failed': 0}
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def open(self):
+        """Create the keep-alive HTTP sessions (must run inside the event loop)"""
+        self.image_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.download_limit, limit_per_host=self.per_host_limit, ttl_dns_cache=300
+            ),
+            timeout=aiohttp.ClientTimeout(total=60)
+        )
+        self.miro_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=MIRO_CONNECTIONS, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=60)
+        )
+        self.miro = MiroClient(self.miro_session)
+
+    async def close(self):
+        for session in (self.image_session, self.miro_session):
+            if session:
+                await session.close()
+        self.image_session = self.miro_session = None
+        self.executor.shutdown(wait=True)
+        self.save_manifest()
+        print(f"  ✓ Images: {self.stats['uploaded']} uploaded, {self.stats['reused']} already in S3, "
+              f"{self.stats['failed']} failed")
+        if self.miro:
+            self.miro.print_stats()
+
+    def load_manifest(self):
+        """{s3 key: source url} of images already uploaded to this bucket"""
+        if not self.manifest_path or not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('bucket') != self.s3_bucket:
+                return {}
+            return manifest.get('keys', {})
+        except (OSError, ValueError) as e:
+            print(f"  ⚠ Ignoring unreadable image manifest: {e}")
+            return {}
+
+    def save_manifest(self):
+        """Write the manifest atomically"""
+        if not self.manifest_path:
+            return
+        try:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.manifest_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'bucket': self.s3_bucket,
+                    'updated_at': datetime.now().isoformat(timespec='seconds'),
+                    'keys': self.known_keys
+                }, f, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            print(f"  ⚠ Could not save image manifest: {e}")
+
+    def image_key(self, image_url):
+        """Content-addressed S3 key: the same source URL always maps to the same object"""
+        digest = hashlib.sha256(image_url.encode('utf-8')).hexdigest()
+        return f"{self.s3_prefix}{digest}.jpg"
+
+    async def run_s3(self, func, *args, **kwargs):
+        """Run a blocking S3 call on the shared executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
+
+    def presigned_url(self, s3_key):
+        """Presigned GET URL for an uploaded image (local signing, no request)"""
+        return self.s3.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.s3_bucket, 'Key': s3_key},
+            ExpiresIn=PRESIGNED_URL_EXPIRES
+        )
+
+    async def download(self, image_url):
+        """Image bytes, or None if the download failed"""
+        try:
+            async with self.image_session.get(image_url) as response:
+                if response.status != 200:
+                    return None
+                return await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return None
+
+    async def exists(self, s3_key):
+        """HEAD check for an object not in the local manifest"""
+        try:
+            await self.run_s3(self.s3.head_object, Bucket=self.s3_bucket, Key=s3_key)
+            return True
+        except ClientError:
+            return False
+
+    async def store(self, image_url, s3_key):
+        """Upload one image unless S3 already has it; True if the object exists afterwards"""
+        try:
+            if await self.exists(s3_key):
+                self.stats['reused'] += 1
+            else:
+                image_data = await self.download(image_url)
+                if image_data is None:
+                    self.stats['failed'] += 1
+                    return False
+                await self.run_s3(
+                    self.s3.put_object,
+                    Bucket=self.s3_bucket, Key=s3_key, Body=image_data, ContentType='image/jpeg'
+                )
+                self.stats['uploaded'] += 1
+        except Exception:
+            self.stats['failed'] += 1
+            return False
+
+        self.known_keys[s3_key] = image_url
+        return True
+
+    async def upload(self, image_url):
+        """Presigned URL of the image in S3, uploading it first if needed; None on failure"""
+        s3_key = self.image_key(image_url)
+        if s3_key in self.urls:
+            return self.urls[s3_key]
+
+        if s3_key in self.known_keys:
+            self.stats['reused'] += 1
+        else:
+            # Concurrent requests for the same image share one upload
+            task = self.pending.get(s3_key)
+            if task is None:
+                task = asyncio.ensure_future(self.store(image_url, s3_key))
+                self.pending[s3_key] = task
+            try:
+                stored = await task
+            finally:
+                self.pending.pop(s3_key, None)
+            if not stored:
+                return None
+
+        url = self.urls.get(s3_key) or self.presigned_url(s3_key)
+        self.urls[s3_key] = url
+        return url
+
+
+async def card_pipeline(items, resolve_image, workers=IMAGE_DOWNLOAD_CONCURRENCY, queue_size=IMAGE_PIPELINE_QUEUE):
+    """
+    Stream products from the image stage to the board: items are (source image url, create_card) pairs,
+    and create_card(presigned_url) runs as soon as that image is in S3 (None if it failed or is missing)
+    Image workers feed a bounded queue, so transfers run ahead of card creation by at most queue_size
+    """
+    todo = asyncio.Queue()
+    for item in items:
+        todo.put_nowait(item)
+    ready = asyncio.Queue(maxsize=queue_size)
+
+    async def image_worker():
+        while True:
+            try:
+                image_url, create_card = todo.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            presigned_url = None
+            if image_url:
+                try:
+                    presigned_url = await resolve_image(image_url)
+                except Exception:
+                    presigned_url = None
+            await ready.put((create_card, presigned_url))
+
+    async def card_worker():
+        while True:
+            item = await ready.get()
+            if item is None:
+                return
+            create_card, presigned_url = item
+            try:
+                await create_card(presigned_url)
+            except Exception as e:
+                print(f"    ⚠ Card failed: {e}")
+
+    cards = asyncio.ensure_future(card_worker())
+    try:
+        await asyncio.gather(*(image_worker() for _ in range(max(1, workers))))
+        await ready.put(None)
+        await cards
+    finally:
+        cards.cancel()
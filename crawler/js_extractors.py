@@ -0,0 +1,110 @@
+"""
+DMM In-Browser Extractors
+JavaScript for execute_script that reads a whole page in one WebDriver round trip
+Returns raw fields for product_parser.build_product / build_detail / build_extra
+"""
+
+import json
+
+from product_parser import LIST_ITEM_SELECTOR, LIST_SELECTORS, DETAIL_SELECTORS, EXTRA_SELECTORS
+
+
+_HELPERS = """
+const text = (root, sel) => { const el = root.querySelector(sel); return el ? el.innerText : null; };
+const texts = (root, sel) => Array.from(root.querySelectorAll(sel), el => el.innerText);
+"""
+
+
+def _script(selectors, body):
+    """Prefix a script body with the text helpers and its selector table"""
+    return _HELPERS + f"const S = {json.dumps(selectors, ensure_ascii=False)};\n" + body
+
+
+# Raw fields for every li.productList__item on a list page
+LIST_ITEMS_JS = _script(LIST_SELECTORS, f"""
+return Array.from(document.querySelectorAll({json.dumps(LIST_ITEM_SELECTOR)}), li => {{
+    const raw = {{}};
+    const link = li.querySelector(S.link);
+    const img = li.querySelector(S.image);
+    if (link) {{
+        raw.product_url = link.href;
+        if (img) raw.image_url = img.src;
+    }}
+    raw.title = text(li, S.title);
+    raw.writer = text(li, S.writer);
+    raw.genre = text(li, S.genre);
+    raw.is_exclusive = !!li.querySelector(S.exclusive);
+    raw.discount = text(li, S.discount);
+    raw.sale_price = text(li, S.sale_price);
+    const basket = li.querySelector(S.basket);
+    if (basket) {{
+        raw.basket_price = basket.getAttribute('data-price') || '';
+    }} else {{
+        raw.basket_price = null;
+        raw.price_texts = texts(li, S.prices);
+    }}
+    raw.sales = text(li, S.sales);
+    raw.rating = text(li, S.rating);
+    const rate = li.querySelector(S.rate_container);
+    raw.rate_texts = rate ? texts(rate, S.rate_texts) : [];
+    return raw;
+}});
+""")
+
+# Raw fields for detail mode from a product page
+DETAIL_INFO_JS = _script(DETAIL_SELECTORS, """
+const pairs = (itemSel, firstSel, secondSel) => {
+    const result = [];
+    document.querySelectorAll(itemSel).forEach(item => {
+        const first = text(item, firstSel);
+        const second = text(item, secondSel);
+        if (first !== null && second !== null) result.push([first, second]);
+    });
+    return result;
+};
+return {
+    title: text(document, S.title),
+    circle: text(document, S.circle),
+    circle_fans: text(document, S.circle_fans),
+    rankings: pairs(S.ranking_items, S.ranking_label, S.ranking_number),
+    total_sales: text(document, S.total_sales),
+    review_count: text(document, S.review_count),
+    favorites: text(document, S.favorites),
+    information: pairs(S.information_items, S.information_title, S.information_text),
+    genres: texts(document, S.genres),
+    campaign_discount: text(document, S.campaign_discount),
+    campaign_end_date: text(document, S.campaign_end_date),
+    campaign_price: text(document, S.campaign_price),
+    original_price: text(document, S.original_price)
+};
+""")
+
+# Raw fields for extra mode (commentary, rating distribution, reviews) from a product page
+EXTRA_INFO_JS = _script(EXTRA_SELECTORS, """
+const ratingClass = root => {
+    const el = root.querySelector(S.rating_class);
+    return el ? el.getAttribute('class') : null;
+};
+let commentary = null;
+for (const sel of S.commentary) {
+    commentary = text(document, sel);
+    if (commentary !== null) break;
+}
+return {
+    commentary: commentary,
+    avg_rating: text(document, S.avg_rating),
+    evaluates: text(document, S.evaluates),
+    rating_rows: Array.from(document.querySelectorAll(S.rating_rows), row => ({
+        rating_class: ratingClass(row),
+        texts: texts(row, S.row_spans)
+    })),
+    reviews: Array.from(document.querySelectorAll(S.reviews), item => ({
+        rating_class: ratingClass(item),
+        title: text(item, S.review_title),
+        comment: text(item, S.review_comment),
+        reviewer: text(item, S.review_reviewer),
+        date: text(item, S.review_date),
+        voted: text(item, S.review_voted)
+    }))
+};
+""")
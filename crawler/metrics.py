@@ -0,0 +1,100 @@
+"""
+DMM Crawl Metrics
+Per-phase durations and counters for a crawl run
+Every timed phase is appended to a JSON lines file as it happens; a summary JSON is written at the end
+"""
+
+import json
+import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class CrawlMetrics:
+    """Phase timings (setup, age check, list loads, detail visits...) and counters, shared by all threads"""
+
+    def __init__(self):
+        self.timings = defaultdict(list)  # phase -> [seconds]
+        self.counters = defaultdict(int)
+        self.started = time.time()
+        self.events_file = None
+        self._lock = threading.Lock()
+
+    def open(self, events_path):
+        """Start writing one JSON line per timed phase"""
+        events_path.parent.mkdir(parents=True, exist_ok=True)
+        self.events_file = open(events_path, 'w', encoding='utf-8')
+
+    def record(self, phase, seconds, **tags):
+        """Record one duration; tags (page, url...) go to the JSON lines event"""
+        with self._lock:
+            self.timings[phase].append(seconds)
+            if self.events_file:
+                event = {
+                    'ts': datetime.now().isoformat(timespec='milliseconds'),
+                    'phase': phase,
+                    'seconds': round(seconds, 3),
+                    **tags
+                }
+                self.events_file.write(json.dumps(event, ensure_ascii=False) + '\n')
+                self.events_file.flush()
+
+    @contextmanager
+    def phase(self, phase, **tags):
+        """Time a block: with metrics.phase('detail_visit', url=url): ..."""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record(phase, time.time() - start, **tags)
+
+    def count(self, name, n=1):
+        """Increment a counter (cache hits, products, pages...)"""
+        with self._lock:
+            self.counters[name] += n
+
+    def summary(self, readiness=None):
+        """Per-phase statistics in seconds, counters, and optionally the readiness wait summary"""
+        with self._lock:
+            summary = {
+                'elapsed': round(time.time() - self.started, 3),
+                'phases': {
+                    phase: {
+                        'count': len(durations),
+                        'total': round(sum(durations), 3),
+                        'avg': round(sum(durations) / len(durations), 3),
+                        'max': round(max(durations), 3)
+                    }
+                    for phase, durations in self.timings.items()
+                },
+                'counters': dict(self.counters)
+            }
+        if readiness:
+            summary['readiness'] = readiness.summary()
+        return summary
+
+    def write_summary(self, path, readiness=None):
+        """Write the summary JSON and close the events file; returns the summary"""
+        summary = self.summary(readiness)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        self.close()
+        return summary
+
+    def print_summary(self):
+        """Print where the time went, slowest phases first"""
+        summary = self.summary()
+        if not summary['phases']:
+            return
+        print(f"\nPhase timings ({summary['elapsed']}s total):")
+        for phase, stats in sorted(summary['phases'].items(), key=lambda item: -item[1]['total']):
+            print(f"  {phase}: {stats['count']}x, total {stats['total']}s, "
+                  f"avg {stats['avg']}s, max {stats['max']}s")
+
+    def close(self):
+        with self._lock:
+            if self.events_file:
+                self.events_file.close()
+                self.events_file = None
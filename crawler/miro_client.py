@@ -0,0 +1,187 @@
+"""
+DMM Miro Client
+Async Miro REST client shared by both board uploaders for an upload run:
+- follows the X-RateLimit-* headers and pauses before the budget runs out
+- retries 429 and 5xx responses with jittered exponential backoff, honouring Retry-After;
+  a POST is retried only when it was certainly not applied (429, 503, or no connection)
+- adapts its concurrency (additive increase, halved on 429) to stay just under the limit
+"""
+
+import os
+import time
+import random
+import asyncio
+
+import aiohttp
+
+from config import (
+    MIRO_CONCURRENCY, MIRO_MAX_CONCURRENCY, MIRO_MAX_RETRIES, MIRO_RATE_RESERVE
+)
+
+
+MIRO_API = "https://api.miro.com/v2"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Responses after which a non-idempotent request was certainly not applied (a 500/502/504 may have been)
+NOT_APPLIED_STATUSES = {429, 503}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'}
+
+
+class MiroClient:
+    """
+    Rate-limit-aware requests against the Miro API (create inside the event loop):
+        client = MiroClient(session)
+        status, data, error = await client.request('POST', f'boards/{board_id}/items/bulk', items)
+    """
+
+    def __init__(self, session, token=None, concurrency=MIRO_CONCURRENCY,
+                 max_concurrency=MIRO_MAX_CONCURRENCY, max_retries=MIRO_MAX_RETRIES,
+                 rate_reserve=MIRO_RATE_RESERVE):
+        self.session = session
+        self.headers = {
+            'Authorization': f'Bearer {token or os.getenv("MIRO_TOKEN")}',
+            'Content-Type': 'application/json'
+        }
+        self.max_retries = max_retries
+        self.rate_reserve = rate_reserve
+
+        # Adaptive concurrency: requests in flight are kept under `limit`
+        self.limit = float(max(1, concurrency))
+        self.max_concurrency = max(1, max_concurrency)
+        self.in_flight = 0
+        self._slots = asyncio.Condition()
+
+        # Rate-limit budget from the latest response headers
+        self.rate_limit = None
+        self.remaining = None
+        self.reset_at = 0.0
+
+        self.stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'failed': 0}
+
+    async def _acquire(self):
+        async with self._slots:
+            await self._slots.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def _release(self):
+        async with self._slots:
+            self.in_flight -= 1
+            self._slots.notify_all()
+
+    def _read_rate_headers(self, headers):
+        """Update the budget from X-RateLimit-Limit / -Remaining / -Reset"""
+        try:
+            if 'X-RateLimit-Limit' in headers:
+                self.rate_limit = int(headers['X-RateLimit-Limit'])
+            if 'X-RateLimit-Remaining' in headers:
+                self.remaining = int(headers['X-RateLimit-Remaining'])
+            if 'X-RateLimit-Reset' in headers:
+                reset = float(headers['X-RateLimit-Reset'])
+                # Epoch seconds, or seconds until the window resets
+                self.reset_at = reset if reset > 1e9 else time.time() + reset
+        except ValueError:
+            pass
+
+    def _reserve(self):
+        if self.rate_limit:
+            return max(1, int(self.rate_limit * self.rate_reserve))
+        return 1
+
+    async def _wait_for_budget(self):
+        """Pause new requests while the remaining budget is at the reserve, until the window resets"""
+        while self.remaining is not None and self.remaining <= self._reserve():
+            delay = self.reset_at - time.time()
+            if delay <= 0:
+                self.remaining = None
+                return
+            self.stats['throttled'] += 1
+            await asyncio.sleep(min(delay, 60) + random.uniform(0, 0.5))
+
+    def _on_success(self):
+        # Grow by about one slot per `limit` successes, unless the budget is getting tight
+        if self.remaining is None or self.remaining > 2 * self._reserve():
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+
+    async def _on_throttled(self):
+        async with self._slots:
+            self.limit = max(1.0, self.limit / 2)
+
+    def _backoff(self, attempt, retry_after=None):
+        """Retry-After if given, else exponential backoff; both with jitter"""
+        if retry_after:
+            try:
+                return float(retry_after) + random.uniform(0, 1)
+            except ValueError:
+                pass
+        return min(30.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    async def request(self, method, path, payload=None):
+        """
+        Send one API request with retries
+        Returns (HTTP status or None if no response, response data, error text or None on success)
+        """
+        url = f"{MIRO_API}/{path}"
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        status, error = None, None
+
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_budget()
+            await self._acquire()
+            retry_after = None
+            try:
+                self.stats['requests'] += 1
+                if self.remaining is not None:
+                    self.remaining -= 1
+                async with self.session.request(method, url, headers=self.headers, json=payload) as response:
+                    self._read_rate_headers(response.headers)
+                    status = response.status
+                    if response.status in [200, 201, 204]:
+                        self._on_success()
+                        try:
+                            data = await response.json(content_type=None)
+                        except ValueError:
+                            data = None
+                        return status, data, None
+
+                    error = f"{response.status}: {(await response.text())[:100]}"
+                    retry_statuses = RETRY_STATUSES if idempotent else NOT_APPLIED_STATUSES
+                    if response.status not in retry_statuses:
+                        break
+                    if response.status == 429:
+                        retry_after = response.headers.get('Retry-After')
+                        await self._on_throttled()
+            except aiohttp.ClientConnectorError as e:
+                status = None
+                # Connection never established: the request was not sent
+                error = str(e) or type(e).__name__
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = None
+                error = str(e) or type(e).__name__
+                # The server may have applied it (timeout, dropped connection); creating items again
+                # would duplicate them
+                if not idempotent:
+                    break
+            finally:
+                await self._release()
+
+            if attempt < self.max_retries:
+                self.stats['retries'] += 1
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+
+        self.stats['failed'] += 1
+        return status, None, error
+
+    async def create_board(self, name, description=""):
+        """Create a board; returns its id, or None"""
+        status, data, error = await self.request('POST', 'boards', {
+            "name": name,
+            "description": description
+        })
+        if error or not data:
+            print(f"  Miro board creation failed: {error}")
+            return None
+        return data.get("id")
+
+    def print_stats(self):
+        print(f"  ✓ Miro API: {self.stats['requests']} requests, {self.stats['retries']} retries, "
+              f"{self.stats['throttled']} budget pauses, {self.stats['failed']} failed "
+              f"(concurrency {int(self.limit)})")
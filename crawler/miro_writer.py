@@ -0,0 +1,140 @@
+"""
+DMM Miro Item Writer
+Collects board items (shapes, images) from the card builders and creates them through
+Miro's bulk item endpoint, a batch per request instead of one request per shape
+"""
+
+import asyncio
+
+from config import MIRO_BULK_BATCH
+
+
+MIRO_BULK_LIMIT = 20  # Items per bulk request accepted by Miro
+VALIDATION_STATUSES = {400, 422}  # Batch rejected for its content: worth retrying item by item
+
+# Single-item endpoints, used when a bulk request is rejected as invalid
+ITEM_ENDPOINTS = {
+    'shape': 'shapes',
+    'image': 'images',
+    'text': 'texts'
+}
+
+
+def text_box_item(text, x, y, width, height, fill_color="#ffffff", font_size=12, bold=False):
+    """Text box (rectangle shape), as a bulk item"""
+    content = f"<p><strong>{text}</strong></p>" if bold else f"<p>{text}</p>"
+    return {
+        "type": "shape",
+        "data": {
+            "content": content,
+            "shape": "rectangle"
+        },
+        "style": {
+            "fillColor": fill_color
+        },
+        "position": {
+            "x": x,
+            "y": y
+        },
+        "geometry": {
+            "width": width,
+            "height": height
+        }
+    }
+
+
+def image_item(image_url, x, y, width, title=""):
+    """Image by URL, as a bulk item"""
+    return {
+        "type": "image",
+        "data": {
+            "url": image_url,
+            "title": title
+        },
+        "position": {
+            "x": x,
+            "y": y
+        },
+        "geometry": {
+            "width": width
+        }
+    }
+
+
+class MiroItemWriter:
+    """
+    Buffered bulk writer for one board:
+        writer = MiroItemWriter(client, board_id)
+        await writer.add([text_box_item(...), image_item(...)])
+        await writer.flush()
+    Batches are sent concurrently through the shared MiroClient (which bounds and paces them)
+    A bulk request is all-or-nothing, so a batch rejected as invalid (400/422) is retried item by item
+    and only the items Miro refuses are counted as failed; any other failure (rate limit or server
+    errors after the client's retries, timeouts that may have been applied) fails the whole batch
+    """
+
+    def __init__(self, client, board_id, batch_size=MIRO_BULK_BATCH):
+        self.client = client
+        self.board_id = board_id
+        self.batch_size = max(1, min(batch_size, MIRO_BULK_LIMIT))
+        self.buffer = []
+        self.sending = set()
+        self.stats = {'created': 0, 'failed': 0, 'requests': 0}
+
+    async def add(self, items):
+        """Queue items; full batches are sent right away"""
+        self.buffer.extend(items)
+        while len(self.buffer) >= self.batch_size:
+            batch, self.buffer = self.buffer[:self.batch_size], self.buffer[self.batch_size:]
+            await self.send(batch)
+
+    async def send(self, batch):
+        """Start a batch in the background, waiting first if too many are already in flight"""
+        while len(self.sending) >= 2 * self.client.max_concurrency:
+            await asyncio.wait(self.sending, return_when=asyncio.FIRST_COMPLETED)
+        task = asyncio.ensure_future(self.create_batch(batch))
+        self.sending.add(task)
+        task.add_done_callback(self.sending.discard)
+
+    async def flush(self):
+        """Send whatever is still buffered and wait for every batch"""
+        while self.buffer:
+            batch, self.buffer = self.buffer[:self.batch_size], self.buffer[self.batch_size:]
+            await self.send(batch)
+        if self.sending:
+            await asyncio.gather(*list(self.sending), return_exceptions=True)
+
+    async def post(self, path, payload):
+        """POST to the board; returns (HTTP status or None, error text or None)"""
+        self.stats['requests'] += 1
+        status, _, error = await self.client.request('POST', f"boards/{self.board_id}/{path}", payload)
+        return status, error
+
+    async def create_batch(self, items):
+        """Create up to MIRO_BULK_LIMIT items in one request, falling back to one request per item"""
+        status, error = await self.post('items/bulk', items)
+        if not error:
+            self.stats['created'] += len(items)
+            return
+
+        if status in VALIDATION_STATUSES:
+            # One invalid item rejects the batch; create the rest individually
+            print(f"    Bulk create rejected ({error}), retrying {len(items)} items one by one")
+            await asyncio.gather(*(self.create_item(item) for item in items))
+        else:
+            self.stats['failed'] += len(items)
+            print(f"    Bulk create failed ({error or 'no response'}), {len(items)} items not created")
+
+    async def create_item(self, item):
+        """Create one item on its single-item endpoint"""
+        payload = {key: value for key, value in item.items() if key != 'type'}
+        _, error = await self.post(ITEM_ENDPOINTS.get(item['type'], 'shapes'), payload)
+        if not error:
+            self.stats['created'] += 1
+        else:
+            self.stats['failed'] += 1
+            print(f"    {item['type'].capitalize()} failed ({error})")
+
+    def print_stats(self):
+        print(f"   Miro items: {self.stats['created']} created, {self.stats['failed']} failed "
+              f"in {self.stats['requests']} requests")
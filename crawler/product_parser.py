@@ -0,0 +1,606 @@
+"""
+DMM Product Parser
+Builds product, detail and extra records from raw page fields and parses list page HTML
+Shared by the Selenium and HTTP crawl engines
+"""
+
+import re
+import json
+from urllib.parse import urljoin
+
+
+# CSV field sets per mode
+BASE_FIELDS = [
+    'index', 'category', 'image_url', 'product_url', 'title', 'writer', 'genre',
+    'is_exclusive', 'discount', 'sale_price', 'original_price',
+    'copies_sold', 'rating', 'review_count'
+]
+DETAIL_FIELDS = [
+    'extra_info', 'total_sales', 'review_count_detail', 'favorites',
+    'release_date', 'contents_meta', 'format', 'pages', 'genres', 'file_size',
+    'title_detail', 'circle', 'circle_fans',
+    'campaign_discount', 'campaign_end_date', 'campaign_price', 'original_price_detail'
+]
+EXTRA_FIELDS = [
+    'commentary', 'avg_rating', 'total_reviews', 'reviews_with_comments',
+    'rating_distribution', 'reviews'
+]
+
+
+def fields_for_mode(mode):
+    """Output columns for a crawl mode: base, plus detail fields, plus extra fields"""
+    fields = list(BASE_FIELDS)
+    if mode in ('detail', 'extra'):
+        fields.extend(DETAIL_FIELDS)
+    if mode == 'extra':
+        fields.extend(EXTRA_FIELDS)
+    return fields
+
+
+# Column types for typed output (Parquet) and for reading CSV values back; other fields are text
+# (contents_meta, rating_distribution and reviews stay JSON-encoded text)
+INT_FIELDS = {
+    'index', 'sale_price', 'original_price', 'copies_sold', 'review_count',
+    'total_sales', 'review_count_detail', 'favorites', 'pages', 'circle_fans',
+    'campaign_price', 'original_price_detail', 'total_reviews', 'reviews_with_comments'
+}
+FLOAT_FIELDS = {'rating', 'avg_rating'}
+BOOL_FIELDS = {'is_exclusive'}
+
+
+# CSS selectors for a single li.productList__item (same as DMMCrawlerV2.extract_product)
+LIST_ITEM_SELECTOR = 'li.productList__item'
+LIST_SELECTORS = {
+    'link': 'div.tileListImg a',
+    'image': 'div.tileListImg img',
+    'title': 'div.tileListTtl__txt a',
+    'writer': 'div.tileListTtl__txt--author a',
+    'genre': 'div.c_icon_genre',
+    'exclusive': 'span.c_icon_exclusive',
+    'discount': 'span.c_icon_priceStatus',
+    'sale_price': 'p.c_txt_price.-em strong',
+    'basket': 'a.tileListPurchaseStatus__btn--addToBasket',
+    'prices': 'p.c_txt_price strong',
+    'sales': 'div.tileListEvaluation__txt',
+    'rating': 'div.tileListEvaluation div.listRate span span[class*="listRate__ico--rate"] span',
+    'rate_container': 'div.listRate',
+    'rate_texts': 'span.listRate__txt',
+}
+
+# CSS selectors for a product detail page (detail mode)
+DETAIL_SELECTORS = {
+    'title': 'h1.productTitle__txt',
+    'circle': 'a.circleName__txt',
+    'circle_fans': 'div.circleFanCount__txt',
+    'ranking_items': 'li.rankingList__item',
+    'ranking_label': 'span.rankingList__txt',
+    'ranking_number': 'span.rankingList__txt--number',
+    'total_sales': 'span.numberOfSales__txt',
+    'review_count': 'span.userReview__txt',
+    'favorites': 'span.favorites__txt',
+    'information_items': 'div.productInformation__item dl.informationList',
+    'information_title': 'dt.informationList__ttl',
+    'information_text': 'dd.informationList__txt',
+    'genres': 'ul.genreTagList a.genreTag__txt',
+    'campaign_discount': 'p.campaignBalloon__ttl',
+    'campaign_end_date': 'p.campaignBalloon__txt',
+    'campaign_price': 'p.priceList__main--emphasis',
+    'original_price': 'span.priceList__sub--big',
+}
+
+# CSS selectors for commentary and reviews on a product detail page (extra mode)
+EXTRA_SELECTORS = {
+    'commentary': [
+        'div.m-productSummary div.summary p.summary__txt',
+        'div.l-areaProductSummary p.summary__txt'
+    ],
+    'avg_rating': 'div.dcd-review__points p.dcd-review__average strong',
+    'evaluates': 'div.dcd-review__points p.dcd-review__evaluates',
+    'rating_rows': 'div.dcd-review__rating_map > div',
+    'rating_class': 'span[class*="dcd-review-rating-"]',
+    'row_spans': 'span',
+    'reviews': 'div.dcd-review__list ul li.dcd-review__unit',
+    'review_title': 'span.dcd-review__unit__title',
+    'review_comment': 'div.dcd-review__unit__comment',
+    'review_reviewer': 'span.dcd-review__unit__reviewer a',
+    'review_date': 'span.dcd-review__unit__postdate',
+    'review_voted': 'p.dcd-review__unit__voted strong',
+}
+
+
+def parse_price(price_text):
+    """Parse price text to integer (e.g., '792엔' -> 792, '1,320円' -> 1320)"""
+    if not price_text:
+        return None
+    # Remove currency symbols and commas
+    cleaned = re.sub(r'[엔円,\s]', '', price_text)
+    try:
+        return int(cleaned)
+    except ValueError:
+        return None
+
+
+def parse_sales(sales_text):
+    """Parse sales text to integer (e.g., '판매수: 13,840' -> 13840)"""
+    if not sales_text:
+        return None
+    # Extract number part
+    match = re.search(r'[\d,]+', sales_text)
+    if match:
+        try:
+            return int(match.group().replace(',', ''))
+        except ValueError:
+            return None
+    return None
+
+
+def parse_review_count(review_text):
+    """Parse review count (e.g., '(21건)' -> 21)"""
+    if not review_text:
+        return None
+    match = re.search(r'\d+', review_text)
+    if match:
+        try:
+            return int(match.group())
+        except ValueError:
+            return None
+    return None
+
+
+def coerce_field(field, value):
+    """Convert a field value (possibly CSV text) to its column type; empty values become None"""
+    if value is None or value == '':
+        return None
+    try:
+        if field in INT_FIELDS:
+            return int(str(value).replace(',', ''))
+        if field in FLOAT_FIELDS:
+            return float(value)
+    except ValueError:
+        return None
+    if field in BOOL_FIELDS:
+        return value if isinstance(value, bool) else str(value) == 'True'
+    return str(value)
+
+
+def build_product(raw, index, category_name=None):
+    """
+    Build a product record from raw list-item fields
+
+    raw keys (all optional): product_url, image_url, title, writer, genre,
+    is_exclusive, discount, sale_price, basket_price (None when there is no
+    basket button), price_texts, sales, rating, rate_texts
+    """
+    product = {
+        'index': index,
+        'category': category_name or 'default',
+        'image_url': raw.get('image_url') or None,
+        'product_url': raw.get('product_url') or None,
+        'title': _strip(raw.get('title')),
+        'writer': _strip(raw.get('writer')),
+        'genre': _strip(raw.get('genre')),
+        'is_exclusive': bool(raw.get('is_exclusive')),
+        'discount': _strip(raw.get('discount')),
+        'sale_price': parse_price(_strip(raw.get('sale_price'))),
+        'original_price': None,
+        'copies_sold': parse_sales(_strip(raw.get('sales'))),
+        'rating': None,
+        'review_count': None
+    }
+
+    # Original Price - from data-price attribute in basket button, else from price text
+    basket_price = raw.get('basket_price')
+    if basket_price is not None:
+        try:
+            product['original_price'] = int(basket_price) if basket_price else None
+        except ValueError:
+            pass
+    else:
+        for text in raw.get('price_texts') or []:
+            text = text.strip()
+            if '円' in text:  # Original price in yen
+                product['original_price'] = parse_price(text)
+                break
+
+    rating_text = _strip(raw.get('rating'))
+    if rating_text:
+        try:
+            product['rating'] = float(rating_text)
+        except ValueError:
+            pass
+
+    # Review Count - look for (21건) pattern
+    for text in raw.get('rate_texts') or []:
+        text = text.strip()
+        if '건' in text or '件' in text:
+            product['review_count'] = parse_review_count(text)
+            break
+
+    return product
+
+
+def build_detail(raw):
+    """
+    Build detail fields from raw detail page fields
+
+    raw keys (all optional): title, circle, circle_fans, rankings ([label, rank]),
+    total_sales, review_count, favorites, information ([title, text]), genres,
+    campaign_discount, campaign_end_date, campaign_price, original_price
+    """
+    detail = dict.fromkeys(DETAIL_FIELDS)
+
+    detail['title_detail'] = _strip(raw.get('title'))
+    detail['circle'] = _strip(raw.get('circle'))
+    detail['circle_fans'] = _parse_digits(raw.get('circle_fans'))
+
+    # Rankings (extra_info)
+    rankings = {}
+    for label, rank in raw.get('rankings') or []:
+        label, rank = label.strip(), rank.strip()
+        if '24時間' in label:
+            rankings['24h'] = rank
+        elif '週間' in label:
+            rankings['weekly'] = rank
+        elif '月間' in label:
+            rankings['monthly'] = rank
+    if rankings:
+        parts = []
+        if '24h' in rankings:
+            parts.append(f"24h: {rankings['24h']}")
+        if 'weekly' in rankings:
+            parts.append(f"weekly: {rankings['weekly']}")
+        if 'monthly' in rankings:
+            parts.append(f"monthly: {rankings['monthly']}")
+        detail['extra_info'] = ', '.join(parts)
+
+    detail['total_sales'] = _parse_digits(raw.get('total_sales'))
+
+    review_match = re.search(r'\d+', raw.get('review_count') or '')
+    if review_match:
+        detail['review_count_detail'] = int(review_match.group())
+
+    fav_match = re.search(r'[\d,]+', raw.get('favorites') or '')
+    if fav_match:
+        try:
+            detail['favorites'] = int(fav_match.group().replace(',', ''))
+        except ValueError:
+            pass
+
+    # Product information from informationList
+    contents_meta = {}
+    for ttl, txt in raw.get('information') or []:
+        ttl, txt = ttl.strip(), txt.strip()
+        if '配信開始日' in ttl:
+            detail['release_date'] = txt
+        elif '作者' in ttl:
+            contents_meta['author'] = txt
+        elif 'シナリオ' in ttl:
+            contents_meta['scenario'] = txt
+        elif '作品形式' in ttl:
+            detail['format'] = txt
+        elif 'ページ数' in ttl:
+            pages_match = re.search(r'\d+', txt)
+            if pages_match:
+                detail['pages'] = int(pages_match.group())
+        elif '題材' in ttl:
+            contents_meta['subject'] = txt
+        elif 'キャンペーン' in ttl:
+            contents_meta['campaign'] = txt
+        elif 'ファイル容量' in ttl:
+            detail['file_size'] = txt
+
+    if contents_meta:
+        detail['contents_meta'] = json.dumps(contents_meta, ensure_ascii=False)
+
+    genres = [g.strip() for g in raw.get('genres') or [] if g.strip()]
+    if genres:
+        detail['genres'] = ', '.join(genres)
+
+    # Campaign info from l-areaPurchase
+    if raw.get('campaign_discount') is not None:
+        detail['campaign_discount'] = raw['campaign_discount'].strip().split('\n')[0].strip()
+    detail['campaign_end_date'] = _strip(raw.get('campaign_end_date'))
+    detail['campaign_price'] = _parse_yen(raw.get('campaign_price'))
+    detail['original_price_detail'] = _parse_yen(raw.get('original_price'))
+
+    return detail
+
+
+def build_extra(raw):
+    """
+    Build extra fields from raw commentary/review fields
+
+    raw keys (all optional): commentary, avg_rating, evaluates,
+    rating_rows ({rating_class, texts}), reviews ({rating_class, title,
+    comment, reviewer, date, voted})
+    """
+    extra = dict.fromkeys(EXTRA_FIELDS)
+
+    extra['commentary'] = _strip(raw.get('commentary'))
+
+    try:
+        extra['avg_rating'] = float((raw.get('avg_rating') or '').strip())
+    except ValueError:
+        pass
+
+    # Total reviews and comments count (e.g., "총평가수 21 (5개의 코멘트)")
+    eval_text = raw.get('evaluates') or ''
+    total_match = re.search(r'(\d+)', eval_text)
+    if total_match:
+        extra['total_reviews'] = int(total_match.group(1))
+    comments_match = re.search(r'\((\d+)', eval_text)
+    if comments_match:
+        extra['reviews_with_comments'] = int(comments_match.group(1))
+
+    # Rating distribution (e.g., dcd-review-rating-50 = 5 stars, "18건")
+    distribution = {}
+    for row in raw.get('rating_rows') or []:
+        rating_level = _parse_rating_class(row.get('rating_class'))
+        if rating_level is None:
+            continue
+        for text in row.get('texts') or []:
+            text = text.strip()
+            if '건' in text or '件' in text:
+                count_match = re.search(r'(\d+)', text)
+                if count_match:
+                    distribution[f'{rating_level}_star'] = int(count_match.group(1))
+                    break
+    if distribution:
+        extra['rating_distribution'] = json.dumps(distribution, ensure_ascii=False)
+
+    # Individual reviews
+    reviews_list = []
+    for item in raw.get('reviews') or []:
+        review = {}
+
+        rating = _parse_rating_class(item.get('rating_class'))
+        if rating is not None:
+            review['rating'] = rating
+        for key in ('title', 'comment', 'reviewer'):
+            if item.get(key) is not None:
+                review[key] = item[key].strip()
+
+        # Extract date (e.g., "2025-11-25" from "-2025-11-25 -")
+        date_match = re.search(r'(\d{4}-\d{2}-\d{2})', item.get('date') or '')
+        if date_match:
+            review['date'] = date_match.group(1)
+
+        voted_match = re.search(r'(\d+)', item.get('voted') or '')
+        if voted_match:
+            review['helpful_votes'] = int(voted_match.group(1))
+
+        if review:
+            reviews_list.append(review)
+
+    if reviews_list:
+        extra['reviews'] = json.dumps(reviews_list, ensure_ascii=False)
+
+    return extra
+
+
+def parse_list_html(html, page_url):
+    """Extract raw fields for every list item in a list page's HTML"""
+    from lxml import html as lxml_html
+
+    tree = lxml_html.fromstring(html)
+    return [list_item_fields(li, page_url) for li in _select(tree, LIST_ITEM_SELECTOR)]
+
+
+def list_item_fields(li, page_url):
+    """Extract raw fields from a single lxml li.productList__item element"""
+    raw = {}
+
+    link = _first(li, LIST_SELECTORS['link'])
+    img = _first(li, LIST_SELECTORS['image'])
+    if link is not None:
+        href = link.get('href')
+        raw['product_url'] = urljoin(page_url, href) if href else None
+        if img is not None:
+            src = img.get('src')
+            raw['image_url'] = urljoin(page_url, src) if src else None
+
+    for field, key in (('title', 'title'), ('writer', 'writer'), ('genre', 'genre'),
+                       ('discount', 'discount'), ('sale_price', 'sale_price'),
+                       ('sales', 'sales'), ('rating', 'rating')):
+        elem = _first(li, LIST_SELECTORS[key])
+        if elem is not None:
+            raw[field] = _text(elem)
+
+    raw['is_exclusive'] = _first(li, LIST_SELECTORS['exclusive']) is not None
+
+    basket = _first(li, LIST_SELECTORS['basket'])
+    if basket is not None:
+        raw['basket_price'] = basket.get('data-price') or ''
+    else:
+        raw['basket_price'] = None
+        raw['price_texts'] = [_text(e) for e in _select(li, LIST_SELECTORS['prices'])]
+
+    rate_container = _first(li, LIST_SELECTORS['rate_container'])
+    if rate_container is not None:
+        raw['rate_texts'] = [_text(e) for e in _select(rate_container, LIST_SELECTORS['rate_texts'])]
+
+    return raw
+
+
+def detail_page_fields(tree):
+    """Raw detail fields from a parsed product page"""
+    S = DETAIL_SELECTORS
+
+    def pairs(item_sel, first_sel, second_sel):
+        result = []
+        for item in _select(tree, item_sel):
+            first, second = _first_text(item, first_sel), _first_text(item, second_sel)
+            if first is not None and second is not None:
+                result.append([first, second])
+        return result
+
+    return {
+        'title': _first_text(tree, S['title']),
+        'circle': _first_text(tree, S['circle']),
+        'circle_fans': _first_text(tree, S['circle_fans']),
+        'rankings': pairs(S['ranking_items'], S['ranking_label'], S['ranking_number']),
+        'total_sales': _first_text(tree, S['total_sales']),
+        'review_count': _first_text(tree, S['review_count']),
+        'favorites': _first_text(tree, S['favorites']),
+        'information': pairs(S['information_items'], S['information_title'], S['information_text']),
+        'genres': [_text(e) for e in _select(tree, S['genres'])],
+        'campaign_discount': _first_text(tree, S['campaign_discount']),
+        'campaign_end_date': _first_text(tree, S['campaign_end_date']),
+        'campaign_price': _first_text(tree, S['campaign_price']),
+        'original_price': _first_text(tree, S['original_price'])
+    }
+
+
+def parse_product_page(html):
+    """Raw detail and extra fields from one product page snapshot, parsed once"""
+    from lxml import html as lxml_html
+
+    tree = lxml_html.fromstring(html)
+    return detail_page_fields(tree), extra_page_fields(tree)
+
+
+def extra_page_fields(tree):
+    """Raw commentary, rating distribution and review fields from a parsed product page"""
+    S = EXTRA_SELECTORS
+
+    commentary = None
+    for selector in S['commentary']:
+        commentary = _first_text(tree, selector)
+        if commentary is not None:
+            break
+
+    rating_rows = []
+    for row in _select(tree, S['rating_rows']):
+        rating = _first(row, S['rating_class'])
+        rating_rows.append({
+            'rating_class': rating.get('class') if rating is not None else None,
+            'texts': [_text(e) for e in _select(row, S['row_spans'])]
+        })
+
+    return {
+        'commentary': commentary,
+        'avg_rating': _first_text(tree, S['avg_rating']),
+        'evaluates': _first_text(tree, S['evaluates']),
+        'rating_rows': rating_rows,
+        'reviews': [review_item_fields(item) for item in _select(tree, S['reviews'])]
+    }
+
+
+def parse_review_html(html):
+    """Extract raw review items (same keys as EXTRA_INFO_JS reviews) from review list HTML"""
+    from lxml import html as lxml_html
+
+    if not html or not html.strip():
+        return []
+    tree = lxml_html.fromstring(html)
+    # Fragments from the review endpoint may lack the surrounding div.dcd-review__list
+    items = _select(tree, EXTRA_SELECTORS['reviews']) or _select(tree, EXTRA_SELECTORS['reviews'].split()[-1])
+    return [review_item_fields(item) for item in items]
+
+
+def review_item_fields(item):
+    """Extract raw fields from a single lxml li.dcd-review__unit element"""
+    rating = _first(item, EXTRA_SELECTORS['rating_class'])
+    raw = {'rating_class': rating.get('class') if rating is not None else None}
+
+    for field in ('title', 'comment', 'reviewer', 'date', 'voted'):
+        elem = _first(item, EXTRA_SELECTORS[f'review_{field}'])
+        raw[field] = _text(elem) if elem is not None else None
+
+    return raw
+
+
+# CSS selectors compiled to XPath once per process (the selector tables above are shared with the JS)
+_COMPILED_SELECTORS = {}
+
+
+def _select(element, selector):
+    """All lxml elements matching a CSS selector, using the compiled selector cache"""
+    compiled = _COMPILED_SELECTORS.get(selector)
+    if compiled is None:
+        from lxml.cssselect import CSSSelector
+        compiled = _COMPILED_SELECTORS[selector] = CSSSelector(selector, translator='html')
+    return compiled(element)
+
+
+def _first(element, selector):
+    """Return the first lxml element matching selector, or None"""
+    found = _select(element, selector)
+    return found[0] if found else None
+
+
+def _first_text(element, selector):
+    """Text of the first match, or None (like the JS text() helper)"""
+    found = _first(element, selector)
+    return _text(found) if found is not None else None
+
+
+# innerText: these start and end a line, and script/style content is not rendered
+_BLOCK_TAGS = frozenset([
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure',
+    'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav',
+    'ol', 'p', 'pre', 'section', 'table', 'tr', 'ul'
+])
+_HIDDEN_TAGS = frozenset(['script', 'style', 'noscript', 'template'])
+
+
+def _text(element):
+    """
+    Visible text of an lxml element, laid out like innerText: whitespace (source newlines included)
+    collapses to one space, <br> and block elements break lines, lines are trimmed, empty lines dropped
+    """
+    parts = []
+    _collect_text(element, parts)
+    lines = (' '.join(line.split()) for line in ''.join(parts).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def _collect_text(element, parts):
+    """Append an element's text (without its tail) to parts, with line breaks for <br> and blocks"""
+    if element.tag == 'br':
+        parts.append('\n')
+        return
+    block = element.tag in _BLOCK_TAGS
+    if block:
+        parts.append('\n')
+    if element.text:
+        parts.append(_collapse(element.text))
+    for child in element:
+        # Comments and processing instructions have non-string tags; only their tails are text
+        if isinstance(child.tag, str) and child.tag not in _HIDDEN_TAGS:
+            _collect_text(child, parts)
+        if child.tail:
+            parts.append(_collapse(child.tail))
+    if block:
+        parts.append('\n')
+
+
+def _collapse(text):
+    """Source whitespace as rendered: any run of spaces, tabs or newlines is one space"""
+    return re.sub(r'\s+', ' ', text)
+
+
+def _parse_digits(text):
+    """Parse '1,234' style text to integer, None if not purely digits"""
+    if text is None:
+        return None
+    cleaned = text.strip().replace(',', '')
+    return int(cleaned) if cleaned.isdigit() else None
+
+
+def _parse_yen(text):
+    """Parse '1,320円' style text to integer, None if not a plain price"""
+    if text is None:
+        return None
+    return _parse_digits(text.replace('円', ''))
+
+
+def _parse_rating_class(class_name):
+    """Star level from a review rating class (dcd-review-rating-50 -> 5)"""
+    match = re.search(r'dcd-review-rating-(\d+)', class_name or '')
+    return int(match.group(1)) // 10 if match else None
+
+
+def _strip(value):
+    """Strip a text value, keeping None"""
+    return value.strip() if isinstance(value, str) else value
@@ -0,0 +1,105 @@
+"""
+DMM Product Table
+Typed Parquet output (written page by page next to the CSV) and a loader for CSV or Parquet snapshots
+pyarrow is only needed when Parquet files are written or read
+"""
+
+import csv
+from pathlib import Path
+
+from product_parser import (
+    BASE_FIELDS, DETAIL_FIELDS, INT_FIELDS, FLOAT_FIELDS, BOOL_FIELDS, coerce_field
+)
+
+
+def arrow_schema(fieldnames):
+    """Fixed Arrow schema for a mode's field list"""
+    import pyarrow as pa
+
+    def column_type(field):
+        if field in INT_FIELDS:
+            return pa.int64()
+        if field in FLOAT_FIELDS:
+            return pa.float64()
+        if field in BOOL_FIELDS:
+            return pa.bool_()
+        return pa.string()
+
+    return pa.schema([(field, column_type(field)) for field in fieldnames])
+
+
+class ParquetStreamWriter:
+    """Parquet file with one row group per crawled page (same interface as CsvStreamWriter)"""
+
+    def __init__(self, path, fieldnames):
+        self.path = Path(path)
+        self.fieldnames = fieldnames
+        self.count = 0
+        self.writer = None
+
+    def open(self):
+        """Create the file with the mode's schema"""
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.schema = arrow_schema(self.fieldnames)
+        self.writer = pq.ParquetWriter(str(self.path), self.schema, compression='zstd')
+
+    def write_rows(self, rows):
+        """Append one page of products as a row group"""
+        import pyarrow as pa
+
+        columns = {
+            field: [coerce_field(field, row.get(field)) for row in rows]
+            for field in self.fieldnames
+        }
+        self.writer.write_table(pa.Table.from_pydict(columns, schema=self.schema))
+        self.count += len(rows)
+
+    def close(self):
+        """Finish the file; a Parquet file without any rows is removed"""
+        if not self.writer:
+            return
+        self.writer.close()
+        self.writer = None
+        if self.count == 0:
+            self.path.unlink(missing_ok=True)
+
+
+def load_products(path):
+    """
+    Read a crawl snapshot as a list of typed product dicts
+    .parquet files are read as-is; CSV text is converted with the same column types
+    """
+    path = Path(path)
+
+    if path.suffix == '.parquet':
+        import pyarrow.parquet as pq
+        return pq.read_table(str(path)).to_pylist()
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return [
+            {field: coerce_field(field, value) for field, value in row.items()}
+            for row in csv.DictReader(f)
+        ]
+
+
+# Miro card values for missing or empty fields (anything else reads as '', like the CSV cell)
+CARD_DEFAULTS = {
+    'index': 0,
+    'is_exclusive': False
+}
+
+
+def load_card_products(path):
+    """Base and detail fields of every product in a snapshot, typed, as the Miro uploaders use them"""
+    return [
+        {
+            field: CARD_DEFAULTS.get(field, '') if row.get(field) is None else row[field]
+            for field in BASE_FIELDS + DETAIL_FIELDS
+        }
+        for row in load_products(path)
+    ]
@@ -0,0 +1,102 @@
+"""
+DMM Crawler Readiness Waits
+Waits for the elements each crawl stage needs instead of sleeping for a fixed time
+Records how long every wait actually took
+"""
+
+import time
+import threading
+from collections import defaultdict
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+from config import STAGE_TIMEOUTS, DOM_STABLE_INTERVAL
+
+
+class ReadinessWaiter:
+    """Selector and DOM-stability waits with per-stage timeouts and timing records"""
+
+    def __init__(self, timeouts=None):
+        self.timeouts = dict(STAGE_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+
+        self.timings = defaultdict(list)  # stage -> [seconds waited]
+        self.timeouts_hit = defaultdict(int)  # stage -> number of waits that timed out
+        self._lock = threading.Lock()  # Detail pool threads record concurrently
+
+    def record(self, stage, seconds, timed_out=False):
+        """Record one wait duration for a stage"""
+        with self._lock:
+            self.timings[stage].append(seconds)
+            if timed_out:
+                self.timeouts_hit[stage] += 1
+
+    def wait_for(self, driver, stage, condition):
+        """Wait until condition holds; returns its value, or None on timeout"""
+        started = time.perf_counter()
+        try:
+            result = WebDriverWait(driver, self.timeouts[stage], poll_frequency=0.1).until(condition)
+            self.record(stage, time.perf_counter() - started)
+            return result
+        except TimeoutException:
+            self.record(stage, time.perf_counter() - started, timed_out=True)
+            return None
+
+    def wait_for_selector(self, driver, stage, selector, clickable=False):
+        """Wait for an element matching selector to be present (or clickable)"""
+        locator = (By.CSS_SELECTOR, selector)
+        condition = EC.element_to_be_clickable(locator) if clickable else EC.presence_of_element_located(locator)
+        return self.wait_for(driver, stage, condition)
+
+    def wait_until_gone(self, driver, stage, selector):
+        """Wait for every element matching selector to be hidden or removed"""
+        return self.wait_for(driver, stage, EC.invisibility_of_element_located((By.CSS_SELECTOR, selector)))
+
+    def wait_for_stable_count(self, driver, stage, selector):
+        """Wait until the number of elements matching selector stops changing; returns the count"""
+        script = "return document.querySelectorAll(arguments[0]).length"
+        started = time.perf_counter()
+        deadline = started + self.timeouts[stage]
+
+        count = driver.execute_script(script, selector)
+        stable_since = time.perf_counter()
+        while time.perf_counter() < deadline:
+            if count and time.perf_counter() - stable_since >= DOM_STABLE_INTERVAL:
+                self.record(stage, time.perf_counter() - started)
+                return count
+
+            time.sleep(0.1)
+            new_count = driver.execute_script(script, selector)
+            if new_count != count:
+                count = new_count
+                stable_since = time.perf_counter()
+
+        self.record(stage, time.perf_counter() - started, timed_out=True)
+        return count
+
+    def summary(self):
+        """Per-stage wait statistics in seconds"""
+        with self._lock:
+            return {
+                stage: {
+                    'count': len(durations),
+                    'total': round(sum(durations), 3),
+                    'avg': round(sum(durations) / len(durations), 3),
+                    'max': round(max(durations), 3),
+                    'timeouts': self.timeouts_hit[stage]
+                }
+                for stage, durations in self.timings.items()
+            }
+
+    def print_summary(self):
+        """Print per-stage wait statistics"""
+        summary = self.summary()
+        if not summary:
+            return
+        print("\nReadiness waits:")
+        for stage, stats in summary.items():
+            print(f"  {stage}: {stats['count']} waits, avg {stats['avg']}s, "
+                  f"max {stats['max']}s, {stats['timeouts']} timeouts")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+DMM Offline Re-parse
+Rebuilds base, detail and extra records from archived HTML (html_archive.py) without any network,
+using the same selectors and builders as the live crawler
+Reviews fetched from the review endpoint (REVIEW_API_URL) are not archived; only the reviews
+rendered in the product page are rebuilt
+
+Usage:
+    python reparse.py --archive data/html_archive                     # every archived run
+    python reparse.py --archive data/html_archive runs/doujin_2026-10-17T090000.jsonl --workers 8
+"""
+
+import time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from config import DEFAULT_OUTPUT_DIR, HTML_ARCHIVE_DIR, REPARSE_WORKERS
+from product_parser import (
+    parse_list_html, parse_product_page, build_product, build_detail, build_extra, fields_for_mode
+)
+from html_archive import read_manifest, read_object
+from csv_stream import CsvStreamWriter
+
+
+def _parse_object(task):
+    """Process pool entry point: (kind, archive root, sha256, url) -> raw fields"""
+    kind, root, digest, url = task
+    html = read_object(root, digest)
+    if kind == 'list':
+        return parse_list_html(html, url)
+    return parse_product_page(html)
+
+
+def reparse_run(manifest_path, archive_root, output_dir, executor):
+    """Rebuild one archived run as {manifest name}.csv in output_dir; returns (path, product count)"""
+    header, records = read_manifest(manifest_path)
+    category = header.get('category', 'default')
+    mode = header.get('mode', 'base')
+
+    # Last archived copy wins (a page retried within the run)
+    list_pages = {}
+    product_pages = {}
+    for record in records:
+        if record['kind'] == 'list':
+            list_pages[record.get('page', 0)] = record
+        elif record['kind'] == 'product':
+            product_pages[record['url']] = record
+    if mode == 'base':
+        product_pages = {}
+
+    # Parse every distinct object once
+    tasks = {}
+    for record in list(list_pages.values()) + list(product_pages.values()):
+        tasks.setdefault(record['sha256'], (record['kind'], str(archive_root), record['sha256'], record['url']))
+    parsed = dict(zip(tasks, executor.map(_parse_object, tasks.values(), chunksize=16)))
+
+    # Named after the run ({category}_{timestamp}), so runs from the same day do not overwrite each other
+    writer = CsvStreamWriter(Path(output_dir) / f"{Path(manifest_path).stem}.csv", fields_for_mode(mode))
+    writer.open()
+
+    index = 0
+    for page_num in sorted(list_pages):
+        page_products = []
+        for raw in parsed[list_pages[page_num]['sha256']]:
+            index += 1
+            product = build_product(raw, index, category)
+
+            record = product_pages.get(product['product_url'])
+            if record:
+                raw_detail, raw_extra = parsed[record['sha256']]
+                product.update(build_detail(raw_detail))
+                if mode == 'extra':
+                    product.update(build_extra(raw_extra))
+
+            page_products.append(product)
+        writer.write_rows(page_products)
+
+    writer.close()
+    return writer.path, writer.count
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='DMM Offline Re-parse')
+    parser.add_argument('manifests', nargs='*', help='Run manifests (default: every run in the archive)')
+    parser.add_argument('--archive', default=HTML_ARCHIVE_DIR, required=HTML_ARCHIVE_DIR is None,
+                        help='HTML archive directory')
+    parser.add_argument('--output', default=str(Path(DEFAULT_OUTPUT_DIR) / 'reparsed'), help='Output directory')
+    parser.add_argument('--workers', type=int, default=REPARSE_WORKERS, help='Parser processes')
+    args = parser.parse_args()
+
+    archive_root = Path(args.archive)
+    manifests = [Path(m) for m in args.manifests] or sorted((archive_root / 'runs').glob('*.jsonl'))
+    if not manifests:
+        print(f"✗ No archived runs in {archive_root}")
+        return
+
+    print(f"Re-parsing {len(manifests)} run(s) with {args.workers} worker(s)...")
+    start = time.time()
+    total_products = 0
+
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        for manifest in manifests:
+            if not manifest.is_absolute() and not manifest.exists():
+                manifest = archive_root / manifest
+            try:
+                path, count = reparse_run(manifest, archive_root, args.output, executor)
+                total_products += count
+                print(f"✓ {manifest.name}: {count} products -> {path}")
+            except Exception as e:
+                print(f"✗ {manifest.name}: {e}")
+
+    elapsed = time.time() - start
+    print(f"\nTotal: {total_products} products in {elapsed:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+DMM Review Fetcher
+Pages through a product's reviews from the review endpoint (REVIEW_API_URL) over HTTP,
+several pages at a time, instead of reading only the first page rendered in the DOM
+"""
+
+import re
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    USER_AGENT, PAGE_LOAD_TIMEOUT, AGE_CHECK_COOKIES,
+    REVIEW_API_URL, REVIEW_API_CONCURRENCY, REVIEW_API_MAX_PAGES
+)
+from product_parser import parse_review_html
+
+
+class ReviewFetcher:
+    """Pooled HTTP session sharing the browser's cookies; one instance serves every detail driver"""
+
+    def __init__(self, url_template=REVIEW_API_URL, concurrency=REVIEW_API_CONCURRENCY,
+                 max_pages=REVIEW_API_MAX_PAGES):
+        self.url_template = url_template
+        self.concurrency = max(1, concurrency)
+        self.max_pages = max_pages
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='reviews')
+        self.cookies_synced = False
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency, max_retries=2)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Language': 'ja,en-US;q=0.8,en;q=0.6',
+            'X-Requested-With': 'XMLHttpRequest'
+        })
+        for cookie in AGE_CHECK_COOKIES:
+            self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path='/')
+
+    def sync_cookies(self, driver):
+        """Copy the age-verified browser session's cookies (once)"""
+        with self._lock:
+            if self.cookies_synced:
+                return
+            for cookie in driver.get_cookies():
+                self.session.cookies.set(
+                    cookie['name'], cookie['value'],
+                    domain=cookie.get('domain'), path=cookie.get('path', '/')
+                )
+            self.cookies_synced = True
+
+    @staticmethod
+    def product_id(product_url):
+        """cid from a product URL (.../=/cid=d_123456/), or None"""
+        match = re.search(r'cid=([^/&?]+)', product_url or '')
+        return match.group(1) if match else None
+
+    def fetch_page(self, cid, page, referer):
+        """Raw review items on one review page; None if the request failed"""
+        url = self.url_template.format(cid=cid, page=page)
+        try:
+            response = self.session.get(url, timeout=PAGE_LOAD_TIMEOUT, headers={'Referer': referer})
+        except requests.RequestException:
+            return None
+        if response.status_code != 200:
+            return None
+
+        if 'json' in response.headers.get('Content-Type', ''):
+            try:
+                html = response.json().get('html') or ''
+            except (ValueError, AttributeError):
+                return None
+        else:
+            if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+                response.encoding = 'utf-8'
+            html = response.text
+
+        return parse_review_html(html)
+
+    def fetch_reviews(self, product_url):
+        """
+        Every review of a product as raw review items, fetching up to `concurrency` pages at a time
+        Returns None when the endpoint cannot be used (the caller keeps the DOM reviews)
+        """
+        cid = self.product_id(product_url)
+        if not self.url_template or not cid:
+            return None
+
+        reviews = []
+        seen = set()
+        page = 1
+        while page <= self.max_pages:
+            pages = range(page, min(page + self.concurrency, self.max_pages + 1))
+            futures = [
+                self.executor.submit(contextvars.copy_context().run, self.fetch_page, cid, p, product_url)
+                for p in pages
+            ]
+            results = [future.result() for future in futures]
+
+            if results[0] is None and page == 1:
+                return None
+
+            for items in results:
+                # Stop at the first failed or empty page (or a page that repeats earlier reviews)
+                new_items = []
+                for item in items or []:
+                    key = (item.get('reviewer'), item.get('date'), item.get('title'), item.get('comment'))
+                    if key not in seen:
+                        seen.add(key)
+                        new_items.append(item)
+                if not new_items:
+                    return reviews
+                reviews.extend(new_items)
+
+            page += len(pages)
+
+        return reviews
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
@@ -0,0 +1,131 @@
+"""
+DMM Browser Session Store
+Saves cookies and localStorage of an age-verified session to a JSON file
+and restores them into new WebDrivers (and HTTP sessions) without a page load
+"""
+
+import os
+import json
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+from config import SESSION_MAX_AGE
+
+
+class SessionStore:
+    """Cookie jar + localStorage snapshot for the crawler's browser session"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.data = None
+
+    def load(self):
+        """Load the saved session; returns None if missing, unreadable or too old"""
+        if self.data is not None:
+            return self.data
+
+        if not self.path.exists():
+            return None
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Could not read session file: {e}")
+            return None
+
+        if time.time() - data.get('saved_at', 0) > SESSION_MAX_AGE:
+            print("⚠ Saved session is too old, starting a new one")
+            return None
+
+        self.data = data
+        return data
+
+    def save(self, driver):
+        """Save cookies and the current origin's localStorage"""
+        try:
+            local_storage = driver.execute_script(
+                "const items = {};"
+                "for (let i = 0; i < localStorage.length; i++) {"
+                "  const key = localStorage.key(i); items[key] = localStorage.getItem(key);"
+                "}"
+                "return items;"
+            )
+        except Exception:
+            local_storage = {}
+
+        parsed = urlparse(driver.current_url)
+        self.data = {
+            'saved_at': time.time(),
+            'age_verified': True,
+            'origin': f"{parsed.scheme}://{parsed.netloc}",
+            'cookies': driver.get_cookies(),
+            'local_storage': local_storage or {}
+        }
+
+        # Write then rename, so parallel crawlers never read a half-written file
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+        print(f"✓ Session saved to {self.path}")
+
+    def restore(self, driver):
+        """Apply the saved session to a fresh driver; returns True if one was restored"""
+        data = self.load()
+        if not data or not data.get('age_verified'):
+            return False
+
+        apply_cookies(driver, data.get('cookies', []))
+
+        # localStorage can only be written from the page's origin, so inject it on load
+        if data.get('local_storage'):
+            script = (
+                f"if (location.origin === {json.dumps(data['origin'])}) {{"
+                f"  const items = {json.dumps(data['local_storage'], ensure_ascii=False)};"
+                "  for (const key in items) {"
+                "    if (localStorage.getItem(key) === null) localStorage.setItem(key, items[key]);"
+                "  }"
+                "}"
+            )
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': script})
+
+        return True
+
+    def apply_to_http(self, http_session):
+        """Copy saved cookies into a requests.Session"""
+        data = self.load()
+        if not data:
+            return False
+
+        for cookie in data.get('cookies', []):
+            http_session.cookies.set(
+                cookie['name'], cookie['value'],
+                domain=cookie.get('domain'), path=cookie.get('path', '/')
+            )
+        return True
+
+
+def apply_cookies(driver, cookies):
+    """Set Selenium-format cookies through CDP (works before any page is loaded)"""
+    params = []
+    for cookie in cookies:
+        param = {
+            'name': cookie['name'],
+            'value': cookie['value'],
+            'domain': cookie.get('domain'),
+            'path': cookie.get('path', '/'),
+            'secure': cookie.get('secure', False),
+            'httpOnly': cookie.get('httpOnly', False)
+        }
+        if cookie.get('expiry'):
+            param['expires'] = cookie['expiry']
+        if cookie.get('sameSite') in ('Strict', 'Lax', 'None'):
+            param['sameSite'] = cookie['sameSite']
+        params.append(param)
+
+    if params:
+        driver.execute_cdp_cmd('Network.setCookies', {'cookies': params})
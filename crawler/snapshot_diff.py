@@ -0,0 +1,57 @@
+"""
+DMM Snapshot Diff
+Compares freshly crawled list-level fields with the previous CSV of the same category,
+so detail pages are only revisited for new or changed products
+"""
+
+import re
+import csv
+from pathlib import Path
+
+from product_parser import DETAIL_FIELDS, EXTRA_FIELDS
+
+
+# List page fields that signal a product's detail page may have changed
+CHANGE_FIELDS = ['copies_sold', 'sale_price', 'discount', 'rating', 'review_count']
+
+
+def find_previous_csv(output_dir, category_name):
+    """Most recent {category}_{YYYY-MM-DD}.csv in output_dir, or None"""
+    pattern = re.compile(rf"{re.escape(category_name or 'default')}_\d{{4}}-\d{{2}}-\d{{2}}\.csv")
+    candidates = sorted(p for p in Path(output_dir).glob('*.csv') if pattern.fullmatch(p.name))
+    return candidates[-1] if candidates else None
+
+
+def load_previous_products(csv_path, mode):
+    """
+    Read a previous snapshot as {product_url: row}
+    Only rows that carry the detail (and, for extra mode, extra) fields are usable
+    """
+    products = {}
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        needed = DETAIL_FIELDS + (EXTRA_FIELDS if mode == 'extra' else [])
+        if not set(needed) <= set(reader.fieldnames or []):
+            return products
+
+        for row in reader:
+            if row.get('product_url') and row.get('title_detail'):
+                products[row['product_url']] = row
+
+    return products
+
+
+def _csv_value(value):
+    """Value as csv.DictWriter writes it, for comparing against a CSV row"""
+    return '' if value is None else str(value)
+
+
+def changed_fields(product, previous):
+    """List-level fields whose value differs from the previous snapshot row"""
+    return [f for f in CHANGE_FIELDS if _csv_value(product.get(f)) != (previous.get(f) or '')]
+
+
+def carry_forward(product, previous, mode):
+    """Copy detail (and extra) fields from the previous snapshot row into product"""
+    fields = DETAIL_FIELDS + (EXTRA_FIELDS if mode == 'extra' else [])
+    product.update({f: previous.get(f) or None for f in fields})
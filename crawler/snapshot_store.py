@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+DMM Snapshot Store
+Keeps every crawl run in one SQLite database (indexed by product_url, category and crawl time)
+for per-product time series and top-mover queries
+
+Usage:
+    python snapshot_store.py --db data/snapshots.sqlite series <product_url> [--fields copies_sold,rating]
+    python snapshot_store.py --db data/snapshots.sqlite movers <category> <from_date> <to_date> [--field copies_sold]
+    python snapshot_store.py --db data/snapshots.sqlite import data/*.csv
+"""
+
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime
+
+from config import SNAPSHOT_DB
+from product_parser import BASE_FIELDS, DETAIL_FIELDS, EXTRA_FIELDS, INT_FIELDS, FLOAT_FIELDS, BOOL_FIELDS, coerce_field
+
+
+ALL_FIELDS = BASE_FIELDS + [f for f in DETAIL_FIELDS + EXTRA_FIELDS if f not in BASE_FIELDS]
+NUMERIC_FIELDS = sorted(INT_FIELDS | FLOAT_FIELDS)
+
+
+def _column_type(field):
+    if field in INT_FIELDS or field in BOOL_FIELDS:
+        return 'INTEGER'
+    if field in FLOAT_FIELDS:
+        return 'REAL'
+    return 'TEXT'
+
+
+class SnapshotStore:
+    """Append-only history of crawl runs and their products"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Shared by detail pool threads; parallel category processes each open their own connection
+        self.conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    def _create_tables(self):
+        columns = ', '.join(f'"{field}" {_column_type(field)}' for field in ALL_FIELDS)
+        with self._lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    category TEXT,
+                    mode TEXT,
+                    base_url TEXT,
+                    crawled_at TEXT
+                )
+            """)
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS products (run_id INTEGER, crawled_at TEXT, {columns})")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS runs_category_time ON runs (category, crawled_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS products_url_time ON products (product_url, crawled_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS products_category_time ON products (category, crawled_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS products_run ON products (run_id)")
+
+    def start_run(self, category, mode, base_url=None, crawled_at=None):
+        """Register a crawl run; returns (run_id, crawled_at)"""
+        crawled_at = crawled_at or datetime.now().isoformat(timespec='seconds')
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (category, mode, base_url, crawled_at) VALUES (?, ?, ?, ?)",
+                (category, mode, base_url, crawled_at)
+            )
+        return cursor.lastrowid, crawled_at
+
+    def add_products(self, run_id, crawled_at, products):
+        """Insert one batch (page) of products for a run"""
+        columns = ', '.join(['run_id', 'crawled_at'] + [f'"{field}"' for field in ALL_FIELDS])
+        placeholders = ', '.join('?' * (len(ALL_FIELDS) + 2))
+        rows = [
+            [run_id, crawled_at] + [coerce_field(field, product.get(field)) for field in ALL_FIELDS]
+            for product in products
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(f"INSERT INTO products ({columns}) VALUES ({placeholders})", rows)
+
+    def product_series(self, product_url, fields=('copies_sold', 'rating', 'review_count')):
+        """Values of the given fields for one product, one row per run, oldest first"""
+        for field in fields:
+            if field not in ALL_FIELDS:
+                raise ValueError(f"Unknown field: {field}")
+        selected = ', '.join(f'"{field}"' for field in fields)
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT crawled_at, category, {selected} FROM products "
+                "WHERE product_url = ? ORDER BY crawled_at",
+                (product_url,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def latest_run(self, category, date):
+        """Id of the last run of a category on a date (YYYY-MM-DD), or None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT id FROM runs WHERE category = ? AND crawled_at >= ? AND crawled_at < ? "
+                "ORDER BY crawled_at DESC, id DESC LIMIT 1",
+                (category, date, f"{date}T99")
+            ).fetchone()
+        return row['id'] if row else None
+
+    def top_movers(self, category, from_date, to_date, field='copies_sold', limit=20):
+        """Products with the largest increase in a numeric field between two dates' last runs"""
+        if field not in NUMERIC_FIELDS:
+            raise ValueError(f"Field must be numeric: {', '.join(NUMERIC_FIELDS)}")
+
+        from_run = self.latest_run(category, from_date)
+        to_run = self.latest_run(category, to_date)
+        if from_run is None or to_run is None:
+            missing = from_date if from_run is None else to_date
+            raise ValueError(f"No {category} run on {missing}")
+
+        with self._lock:
+            rows = self.conn.execute(f"""
+                SELECT new.product_url, new.title, old."{field}" AS old_value, new."{field}" AS new_value,
+                       new."{field}" - old."{field}" AS change
+                FROM products AS new
+                JOIN products AS old ON old.product_url = new.product_url AND old.run_id = ?
+                WHERE new.run_id = ? AND new."{field}" IS NOT NULL AND old."{field}" IS NOT NULL
+                ORDER BY change DESC
+                LIMIT ?
+            """, (from_run, to_run, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def import_csv(store, csv_path, mode=None):
+    """Backfill a {category}_{YYYY-MM-DD}.csv (or .parquet) snapshot; returns the product count"""
+    from product_table import load_products
+
+    csv_path = Path(csv_path)
+    match = re.fullmatch(r'(.+)_(\d{4}-\d{2}-\d{2})', csv_path.stem)
+    if not match:
+        raise ValueError(f"Not a crawler snapshot file name: {csv_path.name}")
+    category, date = match.groups()
+
+    products = load_products(csv_path)
+    if mode is None:
+        mode = 'extra' if products and 'commentary' in products[0] else (
+            'detail' if products and 'title_detail' in products[0] else 'base')
+
+    run_id, crawled_at = store.start_run(category, mode, crawled_at=f"{date}T00:00:00")
+    store.add_products(run_id, crawled_at, products)
+    return len(products)
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='DMM Snapshot Store')
+    parser.add_argument('--db', default=SNAPSHOT_DB, required=SNAPSHOT_DB is None,
+                        help='Snapshot database file')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    series = commands.add_parser('series', help='Per-run values of one product')
+    series.add_argument('product_url')
+    series.add_argument('--fields', default='copies_sold,rating,review_count',
+                        help='Comma-separated fields')
+
+    movers = commands.add_parser('movers', help='Largest increases between two dates')
+    movers.add_argument('category')
+    movers.add_argument('from_date', help='YYYY-MM-DD')
+    movers.add_argument('to_date', help='YYYY-MM-DD')
+    movers.add_argument('--field', default='copies_sold', choices=NUMERIC_FIELDS)
+    movers.add_argument('--limit', type=int, default=20)
+
+    backfill = commands.add_parser('import', help='Load existing {category}_{date}.csv files')
+    backfill.add_argument('files', nargs='+')
+
+    args = parser.parse_args()
+    store = SnapshotStore(args.db)
+
+    try:
+        if args.command == 'series':
+            fields = [f.strip() for f in args.fields.split(',') if f.strip()]
+            rows = store.product_series(args.product_url, fields)
+            if not rows:
+                print("No snapshots for this product")
+            for row in rows:
+                values = '  '.join(f"{field}={row[field]}" for field in fields)
+                print(f"{row['crawled_at']}  {row['category']}  {values}")
+
+        elif args.command == 'movers':
+            rows = store.top_movers(args.category, args.from_date, args.to_date, args.field, args.limit)
+            print(f"Top {args.field} movers in {args.category}: {args.from_date} → {args.to_date}")
+            for rank, row in enumerate(rows, 1):
+                print(f"{rank:3}. {row['change']:+} ({row['old_value']} → {row['new_value']})  "
+                      f"{(row['title'] or '')[:40]}  {row['product_url']}")
+
+        elif args.command == 'import':
+            for path in args.files:
+                try:
+                    count = import_csv(store, path)
+                    print(f"✓ {path}: {count} products")
+                except Exception as e:
+                    print(f"✗ {path}: {e}")
+
+    except ValueError as e:
+        print(f"✗ {e}")
+
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
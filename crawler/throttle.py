@@ -0,0 +1,41 @@
+"""
+DMM Crawler Request Throttle
+Keeps list page requests a minimum interval apart
+A shared throttle enforces one politeness limit across crawler processes
+"""
+
+import time
+import threading
+import multiprocessing
+
+
+class RequestThrottle:
+    """Minimum interval between requests, optionally shared between processes"""
+
+    def __init__(self, min_interval, lock=None, last_request=None):
+        self.min_interval = min_interval
+        self.lock = lock or threading.Lock()
+        # multiprocessing.Value('d') when shared, otherwise a plain float
+        self.last_request = last_request
+        self._local_last = 0.0
+
+    @classmethod
+    def shared(cls, min_interval):
+        """Create a throttle that can be handed to worker processes at startup"""
+        return cls(min_interval, multiprocessing.Lock(), multiprocessing.Value('d', 0.0, lock=False))
+
+    def wait(self):
+        """Block until the next request is allowed; returns seconds waited"""
+        with self.lock:
+            last = self.last_request.value if self.last_request is not None else self._local_last
+            remaining = last + self.min_interval - time.time()
+            if remaining > 0:
+                time.sleep(remaining)
+
+            now = time.time()
+            if self.last_request is not None:
+                self.last_request.value = now
+            else:
+                self._local_last = now
+
+        return max(remaining, 0)
@@ -6,6 +6,55 @@ import fs from 'fs/promises';
 
 const execAsync = promisify(exec);
 
+const CRAWLER_TIMEOUT_MS = 30 * 60 * 1000; // 30 minutes
+const SERVICE_POLL_INTERVAL_MS = 2000;
+
+interface CrawlerJobStatus {
+  id: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  error?: string;
+  log?: string;
+}
+
+/**
+ * Submit a job to the long-lived crawler service (crawler/crawler_service.py)
+ * and poll until it finishes. Returns the job log as stdout.
+ */
+async function runViaCrawlerService(serviceUrl: string, job: Record<string, unknown>) {
+  const submitResponse = await fetch(`${serviceUrl}/jobs`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(job),
+  });
+
+  if (!submitResponse.ok) {
+    throw new Error(`Crawler service rejected job (${submitResponse.status}): ${await submitResponse.text()}`);
+  }
+
+  const { id } = await submitResponse.json();
+  console.log('Submitted crawler job:', id);
+
+  const deadline = Date.now() + CRAWLER_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    await new Promise(resolve => setTimeout(resolve, SERVICE_POLL_INTERVAL_MS));
+
+    const statusResponse = await fetch(`${serviceUrl}/jobs/${id}`);
+    if (!statusResponse.ok) {
+      throw new Error(`Crawler service status check failed (${statusResponse.status})`);
+    }
+
+    const status: CrawlerJobStatus = await statusResponse.json();
+    if (status.status === 'succeeded') {
+      return { stdout: status.log || '', stderr: '' };
+    }
+    if (status.status === 'failed') {
+      throw new Error(status.error || 'Crawler job failed');
+    }
+  }
+
+  throw new Error(`Crawler job ${id} timed out`);
+}
+
 export async function POST(request: NextRequest) {
   try {
     const { url, mode, pages, categoryName, miroUploadCircle, miroUploadRanks } = await request.json();
@@ -34,38 +83,57 @@ export async function POST(request: NextRequest) {
     const outputDir = path.join(process.cwd(), 'data', 'crawler', timestamp);
     await fs.mkdir(outputDir, { recursive: true });
 
-    // Build Python command
-    const crawlerPath = path.join(process.cwd(), 'crawler', 'crawler.py');
-    let pythonCommand = `python3 "${crawlerPath}" --url "${url}" --pages ${maxPages} --output "${outputDir}" --category "${category}" --mode ${mode}`;
-
-    // Add Miro upload flags if enabled
-    if (uploadCircle) {
-      pythonCommand += ' --miro-upload-circle';
-    }
-    if (uploadRanks) {
-      pythonCommand += ' --miro-upload-ranks';
-    }
-
-    console.log('Running crawler command:', pythonCommand);
     console.log('Miro CIRCLE upload:', uploadCircle);
     console.log('Miro RANKS upload:', uploadRanks);
 
-    // Set environment variables for Python script
-    const env = {
-      ...process.env,
-      MIRO_TOKEN: process.env.MIRO_TOKEN,
-      AWS_ACCESS_KEY_ID: process.env.AWS_ACCESS_KEY_ID,
-      AWS_SECRET_ACCESS_KEY: process.env.AWS_SECRET_ACCESS_KEY,
-      S3_BUCKET_NAME: process.env.S3_BUCKET_NAME,
-      S3_REGION: process.env.AWS_REGION || 'ap-northeast-2',
-    };
-
-    // Execute Python crawler
-    const { stdout, stderr } = await execAsync(pythonCommand, {
-      maxBuffer: 10 * 1024 * 1024, // 10MB buffer for large outputs
-      timeout: 30 * 60 * 1000, // 30 minutes timeout
-      env,
-    });
+    let stdout: string;
+    let stderr: string;
+
+    const serviceUrl = process.env.CRAWLER_SERVICE_URL;
+    if (serviceUrl) {
+      // Warm crawler service: no Python/Chrome startup or age verification per request
+      console.log('Submitting crawler job to service:', serviceUrl);
+      ({ stdout, stderr } = await runViaCrawlerService(serviceUrl, {
+        url,
+        mode,
+        pages: maxPages,
+        category,
+        output: outputDir,
+        miro_upload_circle: uploadCircle,
+        miro_upload_ranks: uploadRanks,
+      }));
+    } else {
+      // Build Python command
+      const crawlerPath = path.join(process.cwd(), 'crawler', 'crawler.py');
+      let pythonCommand = `python3 "${crawlerPath}" --url "${url}" --pages ${maxPages} --output "${outputDir}" --category "${category}" --mode ${mode}`;
+
+      // Add Miro upload flags if enabled
+      if (uploadCircle) {
+        pythonCommand += ' --miro-upload-circle';
+      }
+      if (uploadRanks) {
+        pythonCommand += ' --miro-upload-ranks';
+      }
+
+      console.log('Running crawler command:', pythonCommand);
+
+      // Set environment variables for Python script
+      const env = {
+        ...process.env,
+        MIRO_TOKEN: process.env.MIRO_TOKEN,
+        AWS_ACCESS_KEY_ID: process.env.AWS_ACCESS_KEY_ID,
+        AWS_SECRET_ACCESS_KEY: process.env.AWS_SECRET_ACCESS_KEY,
+        S3_BUCKET_NAME: process.env.S3_BUCKET_NAME,
+        S3_REGION: process.env.AWS_REGION || 'ap-northeast-2',
+      };
+
+      // Execute Python crawler
+      ({ stdout, stderr } = await execAsync(pythonCommand, {
+        maxBuffer: 10 * 1024 * 1024, // 10MB buffer for large outputs
+        timeout: CRAWLER_TIMEOUT_MS,
+        env,
+      }));
+    }
 
     if (stderr) {
       console.error('Crawler stderr:', stderr);
@@ -96,10 +164,9 @@ export async function POST(request: NextRequest) {
     if (uploadRanks) miroMessages.push('RANKS board');
     const miroSuffix = miroMessages.length > 0 ? ` and uploaded to ${miroMessages.join(' and ')}` : '';
 
-    // Clean up: delete the CSV file and output directory after processing
+    // Clean up: delete the output directory (CSV, metrics and any other run files) after processing
     try {
-      await fs.unlink(csvPath); // Delete CSV file
-      await fs.rmdir(outputDir); // Delete empty directory
+      await fs.rm(outputDir, { recursive: true, force: true });
       console.log('Cleaned up crawler output:', outputDir);
     } catch (cleanupError) {
       console.warn('Failed to clean up crawler output:', cleanupError);